@@ -47,6 +47,13 @@ class Config:
     UPLOAD_FOLDER = os.path.join(os.getcwd(), 'data', 'uploads')
     ALLOWED_EXTENSIONS = {'txt', 'pdf', 'doc', 'docx', 'xlsx', 'csv', 'json', 'xml'}
     
+    # Hand file bodies to a fronting nginx/Apache via X-Sendfile
+    USE_X_SENDFILE = os.getenv('USE_X_SENDFILE', 'false').lower() == 'true'
+    
+    # Response compression (JSON only)
+    COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', '4'))
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', '1024'))
+    
     # Application settings
     APP_NAME = os.getenv('APP_NAME', 'Data Guardians API')
     APP_VERSION = os.getenv('APP_VERSION', '1.0.0')
@@ -54,6 +61,11 @@ class Config:
     # MongoDB settings
     MONGODB_CONNECTION_STRING = os.getenv('MONGODB_CONNECTION_STRING')
     MONGODB_DATABASE = os.getenv('MONGODB_DATABASE', 'infowise')
+    MONGODB_MAX_POOL_SIZE = int(os.getenv('MONGODB_MAX_POOL_SIZE', '50'))
+    # Copy uploaded, OCR and masked files into GridFS; disable for local development
+    STORE_IN_MONGO = os.getenv('STORE_IN_MONGO', 'true').lower() == 'true'
+    # Cached PII configs hold the detected PII itself, so they expire after this long
+    PII_CONFIG_CACHE_TTL = int(os.getenv('PII_CONFIG_CACHE_TTL', str(7 * 24 * 3600)))
     
     @staticmethod
     def init_app(app) -> None:
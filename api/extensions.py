@@ -3,11 +3,19 @@ Flask extensions initialization.
 Simple setup for hackathon prototype.
 """
 
-from typing import Optional
+from typing import Optional, Any
 from flask import Flask
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
+from werkzeug.http import http_date
+import dataclasses
+import datetime
+import decimal
+import gzip
 import logging
+import uuid
+import orjson
 
 
 # Global extension instances
@@ -15,6 +23,44 @@ cors: Optional[CORS] = None
 jwt: Optional[JWTManager] = None
 
 
+def _orjson_default(o: Any) -> Any:
+    """Serialize types orjson doesn't handle natively, matching Flask's defaults."""
+    if isinstance(o, datetime.date):
+        return http_date(o)
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o):
+        return dataclasses.asdict(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class ORJSONProvider(JSONProvider):
+    """JSON provider that serializes responses with orjson."""
+    
+    # Sorted keys and HTTP dates keep output identical to Flask's default provider
+    option = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, default=_orjson_default, option=self.option).decode('utf-8')
+    
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+    
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=_orjson_default, option=self.option),
+            mimetype='application/json'
+        )
+
+
+def init_json(app: Flask) -> None:
+    """Use orjson for request parsing and response serialization."""
+    app.json = ORJSONProvider(app)
+
+
 def init_sessions(app: Flask) -> None:
     """Initialize Flask sessions for OAuth state management."""
     # Configure session settings
@@ -123,14 +169,42 @@ def init_security_headers(app: Flask) -> None:
         return response
 
 
+def init_compression(app: Flask) -> None:
+    """Gzip JSON responses for clients that accept it; files such as PDFs are sent as-is."""
+    from flask import request
+    
+    level = app.config.get('COMPRESS_LEVEL', 4)
+    min_size = app.config.get('COMPRESS_MIN_SIZE', 1024)
+    
+    @app.after_request
+    def compress_response(response):
+        if (response.mimetype != 'application/json'
+                or response.direct_passthrough
+                or response.is_streamed
+                or 'Content-Encoding' in response.headers
+                or 'gzip' not in request.accept_encodings):
+            return response
+        
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+        
+        response.set_data(gzip.compress(data, compresslevel=level))
+        response.headers['Content-Encoding'] = 'gzip'
+        response.vary.add('Accept-Encoding')
+        return response
+
+
 def init_all_extensions(app: Flask) -> None:
     """Initialize all extensions in correct order."""
     init_logging(app)
+    init_json(app)
     setup_request_id_logging(app)
     init_sessions(app)
     init_cors(app)
     init_jwt(app)
     init_security_headers(app)
+    init_compression(app)
     
     # Initialize MongoDB
     from mongodb import init_mongodb
@@ -0,0 +1,24 @@
+"""
+Gunicorn configuration.
+
+Uses threaded workers so long-running uploads, PII detection and MongoDB
+GridFS writes block only their own thread instead of a whole worker process.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+# Each worker process loads the PII models once; threads share them.
+# The app (and its MongoDB client) is created after fork, so keep preload_app off.
+worker_class = 'gthread'
+workers = int(os.getenv('WEB_CONCURRENCY', '1'))
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
+
+# Model loading and masking of large documents can take minutes
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '300'))
+graceful_timeout = 30
+keepalive = 5
+
+# send_file responses go through wsgi.file_wrapper; stream them with sendfile(2)
+sendfile = True
@@ -5,13 +5,29 @@ Handles file storage and retrieval with MongoDB GridFS.
 import gridfs
 import gridfs.errors
 from pymongo import MongoClient
+from pymongo.errors import BulkWriteError
+from pymongo.write_concern import WriteConcern
 from pymongo.collection import Collection
 from pymongo.database import Database
-from typing import Dict, Any, Optional, List, BinaryIO
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, List, BinaryIO, Union
 from flask import current_app
 from bson import ObjectId
 
 
+# Write concern for intermediate records (processing inputs, OCR text,
+# config cache) that callers opt into with transient=True. These are
+# reproducible from local storage, so a single acknowledged, unjournaled
+# write is enough. Everything else keeps the default concern.
+TRANSIENT_WRITE_CONCERN = WriteConcern(w=1, j=False)
+
+# Fields returned by file listings, so other fields stored on a document are not transferred
+FILE_LIST_PROJECTION = {
+    'user_id': 1, 'original_name': 1, 'file_size': 1, 'file_type': 1, 'mime_type': 1,
+    'upload_date': 1, 'status': 1, 'metadata': 1, 'file_id': 1
+}
+
+
 class MongoDatabase:
     """MongoDB database operations with GridFS for file storage."""
     
@@ -21,37 +37,86 @@ class MongoDatabase:
         self._db: Optional[Database] = None
         self._fs: Optional[gridfs.GridFS] = None
         self._documents_collection: Optional[Collection] = None
+        self._transient_db: Optional[Database] = None
+        self._transient_fs: Optional[gridfs.GridFS] = None
+        self._transient_documents_collection: Optional[Collection] = None
     
     def init_app(self, app):
         """Initialize MongoDB with Flask app."""
         self.connection_string = app.config['MONGODB_CONNECTION_STRING']
         self.database_name = app.config['MONGODB_DATABASE']
+        self.max_pool_size = app.config.get('MONGODB_MAX_POOL_SIZE', 50)
+        self.pii_config_cache_ttl = app.config.get('PII_CONFIG_CACHE_TTL', 7 * 24 * 3600)
         self._connect()
     
     def _connect(self):
         """Establish MongoDB connection."""
         try:
-            self._client = MongoClient(self.connection_string)
+            # One client per worker process; its thread-safe connection
+            # pool is shared by all request and background threads
+            self._client = MongoClient(self.connection_string, maxPoolSize=self.max_pool_size)
             self._db = self._client[self.database_name]
             self._fs = gridfs.GridFS(self._db)
             self._documents_collection = self._db.documents
             
+            # Same collections with a relaxed write concern for intermediate writes
+            self._transient_db = self._db.with_options(write_concern=TRANSIENT_WRITE_CONCERN)
+            self._transient_fs = gridfs.GridFS(self._transient_db)
+            self._transient_documents_collection = self._transient_db.documents
+            
             # Create indexes for better performance
             self._documents_collection.create_index("user_id")
             self._documents_collection.create_index("upload_date")
             self._documents_collection.create_index([("user_id", 1), ("upload_date", -1)])
+            self._documents_collection.create_index([("metadata.document_id", 1), ("status", 1)])
+            
+            # Synthetic data lists are per user, newest first; jobs are
+            # looked up and updated by job_id
+            self._db.synthetic_datasets.create_index([("user_id", 1), ("created_at", -1)])
+            self._db.synthetic_jobs.create_index([("user_id", 1), ("created_at", -1)])
+            self._db.synthetic_jobs.create_index("job_id")
+            
+            self._ensure_pii_config_cache_indexes()
             
         except Exception as e:
             current_app.logger.error(f"MongoDB connection error: {str(e)}")
             raise
     
-    def store_file(self, file_data: bytes, file_info: Dict[str, Any]) -> str:
+    def _ensure_pii_config_cache_indexes(self):
+        """
+        Index the PII config cache.
+        
+        Cached configs contain the PII itself, so a TTL index on created_at
+        expires them; an existing TTL index is updated in place when
+        PII_CONFIG_CACHE_TTL changes. The content hash index lets document
+        cleanup delete the entries of removed documents.
+        """
+        cache = self._db.pii_config_cache
+        ttl_index = cache.index_information().get('created_at_1')
+        
+        if ttl_index is None:
+            # One-off migration when the TTL index is first created: entries
+            # cached before it have no created_at and would never expire
+            cache.delete_many({'created_at': {'$exists': False}})
+            cache.create_index("created_at", expireAfterSeconds=self.pii_config_cache_ttl)
+        elif ttl_index.get('expireAfterSeconds') != self.pii_config_cache_ttl:
+            self._db.command('collMod', 'pii_config_cache', index={
+                'keyPattern': {'created_at': 1},
+                'expireAfterSeconds': self.pii_config_cache_ttl
+            })
+        
+        cache.create_index("content_hash")
+    
+    def store_file(self, file_data: Union[bytes, BinaryIO], file_info: Dict[str, Any], transient: bool = False) -> str:
         """
         Store file in GridFS and metadata in documents collection.
         
         Args:
-            file_data: Binary file data
+            file_data: Binary file data, or a binary file object that GridFS
+                reads chunk by chunk so the whole file is never held in memory
             file_info: File metadata information
+            transient: Write with the relaxed TRANSIENT_WRITE_CONCERN; only for
+                intermediate files that can be recreated from local storage
             
         Returns:
             Document ID string
@@ -60,8 +125,13 @@ class MongoDatabase:
             raise RuntimeError("MongoDB not properly initialized")
             
         try:
+            if transient:
+                fs, documents_collection = self._transient_fs, self._transient_documents_collection
+            else:
+                fs, documents_collection = self._fs, self._documents_collection
+            
             # Store file in GridFS
-            file_id = self._fs.put(
+            file_id = fs.put(
                 file_data,
                 filename=file_info['original_name'],
                 content_type=file_info.get('mime_type'),
@@ -85,7 +155,7 @@ class MongoDatabase:
                 'metadata': file_info.get('metadata', {})
             }
             
-            result = self._documents_collection.insert_one(document_data)
+            result = documents_collection.insert_one(document_data)
             return str(result.inserted_id)
             
         except Exception as e:
@@ -359,12 +429,14 @@ class MongoDatabase:
             raise RuntimeError("MongoDB not properly initialized")
         return self._db
 
-    def get_files(self, query: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+    def get_files(self, query: Dict[str, Any] = None, skip: int = 0, limit: int = 0) -> List[Dict[str, Any]]:
         """
         Get files based on query criteria.
         
         Args:
             query: MongoDB query dictionary
+            skip: Number of matching files to skip
+            limit: Maximum number of files to return (0 for no limit)
             
         Returns:
             List of file documents matching the query
@@ -376,7 +448,12 @@ class MongoDatabase:
             if query is None:
                 query = {}
                 
-            documents = self._documents_collection.find(query).sort('upload_date', -1)
+            documents = (
+                self._documents_collection.find(query, FILE_LIST_PROJECTION)
+                .sort('upload_date', -1)
+                .skip(skip)
+                .limit(limit)
+            )
             
             result = []
             for doc in documents:
@@ -399,6 +476,28 @@ class MongoDatabase:
             current_app.logger.error(f"Get files error: {str(e)}")
             return []
 
+    def open_file_stream(self, file_id: ObjectId) -> Optional[gridfs.GridOut]:
+        """
+        Open a GridFS file for streaming.
+        
+        Args:
+            file_id: GridFS file ObjectId (the document's file_id)
+            
+        Returns:
+            Readable GridOut that fetches one chunk at a time, or None if not found
+        """
+        if self._fs is None:
+            raise RuntimeError("MongoDB not properly initialized")
+            
+        try:
+            return self._fs.get(file_id)
+        except gridfs.errors.NoFile:
+            current_app.logger.error(f"File not found in GridFS for file_id: {file_id}")
+            return None
+        except Exception as e:
+            current_app.logger.error(f"File stream open error: {str(e)}")
+            return None
+
     def get_file_data(self, doc_id: ObjectId) -> Optional[bytes]:
         """
         Get file data by document ID.
@@ -431,6 +530,125 @@ class MongoDatabase:
             current_app.logger.error(f"File data retrieval error: {str(e)}")
             return None
 
+    def get_local_path(self, document_id: str, status: str = 'uploaded') -> Optional[str]:
+        """
+        Get the local storage path recorded for a document at upload time.
+        
+        Args:
+            document_id: Processing document ID (metadata.document_id)
+            status: Document status to match
+            
+        Returns:
+            Local file path or None if not recorded
+        """
+        if self._documents_collection is None:
+            raise RuntimeError("MongoDB not properly initialized")
+            
+        try:
+            document = self._documents_collection.find_one(
+                {'metadata.document_id': document_id, 'status': status},
+                {'metadata.local_path': 1}
+            )
+            if not document:
+                return None
+            return document.get('metadata', {}).get('local_path')
+            
+        except Exception as e:
+            current_app.logger.error(f"Local path lookup error: {str(e)}")
+            return None
+
+    def get_cached_pii_configs(self, content_hashes: List[str], detector_version: str) -> Dict[str, str]:
+        """
+        Look up previously generated PII configs by document content hash.
+
+        Args:
+            content_hashes: SHA-256 hex digests of document contents
+            detector_version: Version of the detector the configs must come from
+
+        Returns:
+            Dictionary mapping content hash to raw config file text
+        """
+        if self._db is None:
+            raise RuntimeError("MongoDB not properly initialized")
+
+        try:
+            cursor = self._db.pii_config_cache.find(
+                {'_id': {'$in': [f"{detector_version}:{content_hash}" for content_hash in content_hashes]}},
+                {'content_hash': 1, 'config_text': 1}
+            )
+            return {entry['content_hash']: entry['config_text'] for entry in cursor}
+
+        except Exception as e:
+            current_app.logger.error(f"PII config cache lookup error: {str(e)}")
+            return {}
+
+    def store_cached_pii_configs(self, configs: Dict[str, str], detector_version: str) -> int:
+        """
+        Cache generated PII configs keyed by detector version and document content hash.
+
+        Entries expire through the TTL index on created_at.
+
+        Args:
+            configs: Dictionary mapping content hash to raw config file text
+            detector_version: Version of the detector that generated the configs
+
+        Returns:
+            Number of cache entries inserted
+        """
+        if self._db is None:
+            raise RuntimeError("MongoDB not properly initialized")
+
+        if not configs:
+            return 0
+
+        try:
+            created_at = datetime.now(timezone.utc)
+            result = self._transient_db.pii_config_cache.insert_many(
+                [
+                    {
+                        '_id': f"{detector_version}:{content_hash}",
+                        'content_hash': content_hash,
+                        'detector_version': detector_version,
+                        'config_text': config_text,
+                        'created_at': created_at
+                    }
+                    for content_hash, config_text in configs.items()
+                ],
+                ordered=False
+            )
+            return len(result.inserted_ids)
+
+        except BulkWriteError as e:
+            # Entries cached concurrently by another request are fine to skip
+            return e.details.get('nInserted', 0)
+        except Exception as e:
+            current_app.logger.error(f"PII config cache store error: {str(e)}")
+            return 0
+
+    def delete_cached_pii_configs(self, content_hashes: List[str]) -> int:
+        """
+        Delete cached PII configs for document contents, for every detector version.
+
+        Args:
+            content_hashes: SHA-256 hex digests of document contents
+
+        Returns:
+            Number of cache entries deleted
+        """
+        if self._db is None:
+            raise RuntimeError("MongoDB not properly initialized")
+
+        if not content_hashes:
+            return 0
+
+        try:
+            result = self._db.pii_config_cache.delete_many({'content_hash': {'$in': list(content_hashes)}})
+            return result.deleted_count
+
+        except Exception as e:
+            current_app.logger.error(f"PII config cache delete error: {str(e)}")
+            return 0
+
     def cleanup_input_documents(self, document_id: str) -> bool:
         """
         Remove input documents (status='uploaded') for a given document_id.
@@ -452,9 +670,15 @@ class MongoDatabase:
                 'status': 'uploaded'
             }
             
-            documents = self._documents_collection.find(query)
+            documents = list(self._documents_collection.find(query))
             deleted_count = 0
             
+            # Cached PII configs of these contents must not outlive the documents
+            self.delete_cached_pii_configs([
+                document['metadata']['content_hash'] for document in documents
+                if document.get('metadata', {}).get('content_hash')
+            ])
+            
             for document in documents:
                 try:
                     # Delete file from GridFS
@@ -484,6 +708,22 @@ class MongoDatabase:
             document_id: Document ID to delete
             status: Optional status filter ('uploaded', 'masked', etc.)
             
+        Returns:
+            Number of documents deleted
+        """
+        return self.delete_documents_bulk([document_id], status)
+
+    def delete_documents_bulk(self, document_ids: List[str], status: str = None) -> int:
+        """
+        Delete all documents (and their GridFS files) matching any of the document_ids.
+        
+        GridFS files, their chunks and the document metadata are each removed
+        with a single delete_many instead of one round-trip per file.
+        
+        Args:
+            document_ids: Document IDs to delete
+            status: Optional status filter ('uploaded', 'masked', etc.)
+            
         Returns:
             Number of documents deleted
         """
@@ -492,28 +732,35 @@ class MongoDatabase:
             
         try:
             # Build query
-            query = {'metadata.document_id': document_id}
+            query = {'metadata.document_id': {'$in': list(document_ids)}}
             if status:
                 query['status'] = status
             
-            documents = self._documents_collection.find(query)
-            deleted_count = 0
+            documents = list(self._documents_collection.find(query, {'file_id': 1, 'metadata.content_hash': 1}))
+            if not documents:
+                return 0
             
-            for document in documents:
-                try:
-                    # Delete file from GridFS
-                    self._fs.delete(document['file_id'])
-                    current_app.logger.info(f"Deleted GridFS file: {document['file_id']}")
-                except gridfs.errors.NoFile:
-                    current_app.logger.warning(f"GridFS file not found for deletion: {document['file_id']}")
-                
-                # Delete document metadata
-                result = self._documents_collection.delete_one({'_id': document['_id']})
-                if result.deleted_count > 0:
-                    deleted_count += 1
-                    current_app.logger.info(f"Deleted document metadata: {document['_id']}")
+            # Cached PII configs of these contents must not outlive the documents
+            content_hashes = {
+                document['metadata']['content_hash'] for document in documents
+                if document.get('metadata', {}).get('content_hash')
+            }
+            if content_hashes:
+                cache_deleted = self.delete_cached_pii_configs(list(content_hashes))
+                current_app.logger.info(f"Deleted {cache_deleted} cached PII configs")
+            
+            # Delete files from GridFS
+            file_ids = [document['file_id'] for document in documents if 'file_id' in document]
+            if file_ids:
+                self._db.fs.chunks.delete_many({'files_id': {'$in': file_ids}})
+                files_result = self._db.fs.files.delete_many({'_id': {'$in': file_ids}})
+                current_app.logger.info(f"Deleted {files_result.deleted_count} GridFS files")
+            
+            # Delete document metadata
+            result = self._documents_collection.delete_many({'_id': {'$in': [document['_id'] for document in documents]}})
+            current_app.logger.info(f"Deleted {result.deleted_count} document metadata records")
             
-            return deleted_count
+            return result.deleted_count
             
         except Exception as e:
             current_app.logger.error(f"Document deletion by document_id error: {str(e)}")
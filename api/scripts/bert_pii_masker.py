@@ -46,6 +46,13 @@ except ImportError:
     print("python-docx not found. Please install: pip install python-docx")
     sys.exit(1)
 
+# Page extraction lives in a light module that its worker processes import
+# instead of this one; imported as scripts.bert_pii_masker or run directly
+if __package__:
+    from .pdf_text import extract_pdf_text
+else:
+    from pdf_text import extract_pdf_text
+
 @dataclass
 class PIIConfig:
     """Configuration for PII masking with coordinates."""
@@ -64,12 +71,13 @@ class BERTPIIMasker:
     BERT-based PII masker with configurable strategies and LLM validation.
     """
     
-    def __init__(self):
-        self.ner_pipeline = None
+    def __init__(self, ner_pipeline=None):
+        self.ner_pipeline = ner_pipeline
         self.pseudo_data = self._initialize_pseudo_data()
         self.used_mappings = {}  # Global mappings for consistency
         self.name_part_mappings = {}  # For partial name consistency: "Aaron" -> "John", "Mehta" -> "Doe"
-        self._initialize_bert_model()
+        if self.ner_pipeline is None:
+            self._initialize_bert_model()
     
     def _initialize_bert_model(self):
         """Initialize BERT NER model."""
@@ -1171,27 +1179,24 @@ class BERTPIIMasker:
         
         return report
 
-    def pdf_to_text(self, pdf_path: str) -> str:
-        """Extract text from PDF while preserving structure."""
+    def pdf_to_text(self, pdf_path: str, workers: int = 1) -> str:
+        """
+        Extract text from PDF while preserving structure.
+        
+        With workers > 1, large PDFs are split into page ranges extracted on
+        a process pool shared by all masking jobs, each opening the PDF by
+        filename.
+        """
         try:
-            doc = fitz.open(pdf_path)
-            full_text = ""
-            
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                page_text = page.get_text()
-                full_text += page_text + "\n\n"  # Add page breaks
-                
-            doc.close()
-            return full_text
+            return extract_pdf_text(pdf_path, workers)
         except Exception as e:
             logger.error(f"Error extracting text from PDF: {e}")
             raise
 
-    def pdf_to_docx(self, pdf_path: str, docx_path: str):
+    def pdf_to_docx(self, pdf_path: str, docx_path: str, workers: int = 1):
         """Convert PDF to Word document."""
         try:
-            text = self.pdf_to_text(pdf_path)
+            text = self.pdf_to_text(pdf_path, workers)
             doc = Document()
             
             # Split text into paragraphs
@@ -1374,8 +1379,50 @@ class BERTPIIMasker:
             logger.error(f"Error converting text to PDF: {e}")
             raise
 
+    def process_text_document(self, input_path: str, output_pdf_path: str,
+                              pii_configs: List[PIIConfig]) -> Dict[str, Any]:
+        """
+        Mask a Word or text document directly and render the result as PDF.
+        
+        Skips the document -> PDF -> text round-trip used for PDFs, since
+        text substitution does not need page coordinates.
+        
+        Args:
+            input_path: Path to input .docx or .txt file
+            output_pdf_path: Path to output masked PDF file
+            pii_configs: List of PII configurations
+            
+        Returns:
+            Dictionary with processing statistics
+        """
+        import tempfile
+        import shutil
+        
+        try:
+            if input_path.lower().endswith('.docx'):
+                temp_dir = tempfile.mkdtemp()
+                try:
+                    temp_docx_masked = os.path.join(temp_dir, "temp_masked.docx")
+                    stats = self.mask_docx(input_path, temp_docx_masked, pii_configs)
+                    self.docx_to_pdf(temp_docx_masked, output_pdf_path)
+                finally:
+                    shutil.rmtree(temp_dir, ignore_errors=True)
+            else:
+                with open(input_path, 'r', encoding='utf-8', errors='replace') as f:
+                    text = f.read()
+                masked_text, stats = self.mask_text(text, pii_configs)
+                self.text_to_pdf(masked_text, output_pdf_path)
+            
+            logger.info(f"Document processing completed: {output_pdf_path}")
+            return stats
+            
+        except Exception as e:
+            logger.error(f"Error in direct document masking: {e}")
+            raise
+
     def process_pdf_via_text_conversion(self, input_pdf_path: str, output_pdf_path: str, 
-                                      pii_configs: List[PIIConfig], use_docx: bool = True) -> Dict[str, Any]:
+                                      pii_configs: List[PIIConfig], use_docx: bool = True,
+                                      workers: int = 1) -> Dict[str, Any]:
         """
         Process PDF by converting to text/docx, masking, then converting back to PDF.
         
@@ -1384,6 +1431,7 @@ class BERTPIIMasker:
             output_pdf_path: Path to output masked PDF file
             pii_configs: List of PII configurations
             use_docx: If True, convert via Word document; if False, use plain text
+            workers: Number of processes used to extract text from large PDFs
             
         Returns:
             Dictionary with processing statistics
@@ -1401,7 +1449,7 @@ class BERTPIIMasker:
                 
                 # Step 1: PDF -> DOCX
                 logger.info("Converting PDF to Word document...")
-                self.pdf_to_docx(input_pdf_path, temp_docx_input)
+                self.pdf_to_docx(input_pdf_path, temp_docx_input, workers)
                 
                 # Step 2: Mask DOCX
                 logger.info("Applying PII masking to Word document...")
@@ -1414,7 +1462,7 @@ class BERTPIIMasker:
             else:
                 # Step 1: PDF -> Text
                 logger.info("Extracting text from PDF...")
-                text = self.pdf_to_text(input_pdf_path)
+                text = self.pdf_to_text(input_pdf_path, workers)
                 
                 # Step 2: Mask Text
                 logger.info("Applying PII masking to text...")
@@ -1435,6 +1483,47 @@ class BERTPIIMasker:
             logger.error(f"Error in PDF text conversion workflow: {e}")
             raise
 
+def run(input_pdf: str, output_pdf: str, config_path: str, method: str = "docx",
+        ner_pipeline=None, workers: int = 1) -> Dict[str, Any]:
+    """
+    Mask a PDF using a configuration file, for in-process callers.
+    
+    Word and text inputs are masked directly and rendered as PDF, ignoring method.
+    
+    Args:
+        input_pdf: Path to the input PDF, Word (.docx) or text (.txt) document
+        output_pdf: Path to write the masked PDF
+        config_path: Path to the PII configuration file
+        method: Masking method ('direct', 'text' or 'docx')
+        ner_pipeline: Already loaded NER pipeline to reuse instead of loading the model
+        workers: Number of processes used to extract text from large PDFs
+        
+    Returns:
+        Masking statistics
+    """
+    if method not in ["direct", "text", "docx"]:
+        raise ValueError(f"Invalid method '{method}'. Use 'direct', 'text', or 'docx'")
+    
+    # A fresh masker per document keeps pseudonym mappings document-local
+    masker = BERTPIIMasker(ner_pipeline=ner_pipeline)
+    pii_configs = masker.parse_pii_config(config_path)
+    
+    if not pii_configs:
+        raise ValueError("No PII configurations found")
+    
+    if not input_pdf.lower().endswith('.pdf'):
+        stats = masker.process_text_document(input_pdf, output_pdf, pii_configs)
+    elif method == "direct":
+        stats = masker.mask_pdf_with_config(input_pdf, output_pdf, pii_configs)
+    else:
+        stats = masker.process_pdf_via_text_conversion(input_pdf, output_pdf, pii_configs,
+                                                       use_docx=(method == "docx"), workers=workers)
+    
+    report_path = output_pdf.replace('.pdf', '_masking_report.txt')
+    masker.generate_masking_report(stats, pii_configs, report_path)
+    
+    return stats
+
 def main():
     """Main function for command-line usage."""
     print("BERT PII Masker with Configurable Strategies")
@@ -1442,7 +1531,7 @@ def main():
     
     if len(sys.argv) < 3:
         print("Usage:")
-        print("  python bert_pii_masker.py <input.pdf> <output.pdf> <config_file> [--method=<method>]")
+        print("  python bert_pii_masker.py <input.pdf> <output.pdf> <config_file> [--method=<method>] [--workers=<n>]")
         print("  python bert_pii_masker.py <input.pdf> <output.pdf> --interactive [--method=<method>]")
         print("  python bert_pii_masker.py --sample-config")
         print("")
@@ -1471,6 +1560,17 @@ def main():
         print(f"Error: Invalid method '{method}'. Use 'direct', 'text', or 'docx'")
         return 1
     
+    # Parse workers parameter
+    workers = 1
+    for arg in sys.argv:
+        if arg.startswith("--workers="):
+            try:
+                workers = max(1, int(arg.split("=")[1]))
+            except ValueError:
+                print(f"Error: Invalid workers value '{arg}'")
+                return 1
+            break
+    
     if not os.path.exists(input_pdf):
         print(f"Error: Input file '{input_pdf}' not found")
         return 1
@@ -1502,10 +1602,10 @@ def main():
             stats = masker.mask_pdf_with_config(input_pdf, output_pdf, pii_configs)
         elif method == "text":
             # PDF -> Text -> PDF method
-            stats = masker.process_pdf_via_text_conversion(input_pdf, output_pdf, pii_configs, use_docx=False)
+            stats = masker.process_pdf_via_text_conversion(input_pdf, output_pdf, pii_configs, use_docx=False, workers=workers)
         elif method == "docx":
             # PDF -> Word -> PDF method
-            stats = masker.process_pdf_via_text_conversion(input_pdf, output_pdf, pii_configs, use_docx=True)
+            stats = masker.process_pdf_via_text_conversion(input_pdf, output_pdf, pii_configs, use_docx=True, workers=workers)
         
         # Generate and save report
         report_path = output_pdf.replace('.pdf', '_masking_report.txt')
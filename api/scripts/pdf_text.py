@@ -0,0 +1,81 @@
+"""
+PDF text extraction for the PII masker.
+
+Kept apart from bert_pii_masker so the processes that extract page ranges of
+large PDFs only import PyMuPDF, not the masker's models and settings.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import fitz  # PyMuPDF
+
+# Smallest page range worth handing to a separate extraction process
+MIN_PAGES_PER_WORKER = 50
+
+# Extraction processes shared by every masking job in this process, created
+# on first use; sized to the CPU so concurrent jobs queue instead of
+# oversubscribing it
+_extraction_pool = None
+_extraction_pool_lock = threading.Lock()
+
+
+def extract_pages_text(pdf_path: str, start: int, stop: int) -> str:
+    """Extract text from a page range; opens the PDF itself so it can run in a worker process."""
+    doc = fitz.open(pdf_path)
+    try:
+        return "".join(doc[page_num].get_text() + "\n\n" for page_num in range(start, stop))
+    finally:
+        doc.close()
+
+
+def get_extraction_pool() -> ProcessPoolExecutor:
+    """Get the shared extraction process pool, creating it on first use."""
+    global _extraction_pool
+    if _extraction_pool is None:
+        with _extraction_pool_lock:
+            if _extraction_pool is None:
+                # spawn avoids forking a process that may hold model threads
+                _extraction_pool = ProcessPoolExecutor(
+                    max_workers=os.cpu_count() or 1,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+    return _extraction_pool
+
+
+def _discard_extraction_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken pool so the next extraction starts a fresh one."""
+    global _extraction_pool
+    with _extraction_pool_lock:
+        if _extraction_pool is pool:
+            _extraction_pool = None
+    pool.shutdown(wait=False)
+
+
+def extract_pdf_text(pdf_path: str, workers: int = 1) -> str:
+    """
+    Extract the text of a PDF, page by page.
+
+    With workers > 1, large PDFs are split into that many page ranges and
+    extracted on the shared process pool, each range opening the PDF by
+    filename.
+    """
+    doc = fitz.open(pdf_path)
+    page_count = len(doc)
+    doc.close()
+
+    workers = min(workers, page_count // MIN_PAGES_PER_WORKER)
+    if workers <= 1:
+        return extract_pages_text(pdf_path, 0, page_count)
+
+    bounds = [page_count * i // workers for i in range(workers + 1)]
+    pool = get_extraction_pool()
+    try:
+        return "".join(pool.map(extract_pages_text, [pdf_path] * workers, bounds[:-1], bounds[1:]))
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory); extract in this process instead
+        _discard_extraction_pool(pool)
+        return extract_pages_text(pdf_path, 0, page_count)
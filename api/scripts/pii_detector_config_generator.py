@@ -19,6 +19,7 @@ import logging
 import json
 from typing import List, Dict, Any, Tuple, Optional
 from dataclasses import dataclass
+from collections import Counter
 from langchain_core.messages import SystemMessage, HumanMessage
 from dotenv import load_dotenv
 from langchain_ollama import ChatOllama
@@ -831,11 +832,8 @@ Return ONLY the JSON array, no additional text or explanation."""
             ""
         ]
         
-        stats = {
-            "total_pii": len(unique_pii),
-            "strategies": {},
-            "types": {}
-        }
+        strategy_counts = Counter()
+        type_counts = Counter()
         
         for pii in unique_pii:
             # Format: PII_TEXT:TYPE:STRATEGY:PAGE:X0:Y0:X1:Y1
@@ -843,13 +841,14 @@ Return ONLY the JSON array, no additional text or explanation."""
             config_lines.append(config_line)
             
             # Update statistics
-            if pii.suggested_strategy not in stats["strategies"]:
-                stats["strategies"][pii.suggested_strategy] = 0
-            stats["strategies"][pii.suggested_strategy] += 1
-            
-            if pii.pii_type not in stats["types"]:
-                stats["types"][pii.pii_type] = 0
-            stats["types"][pii.pii_type] += 1
+            strategy_counts[pii.suggested_strategy] += 1
+            type_counts[pii.pii_type] += 1
+        
+        stats = {
+            "total_pii": len(unique_pii),
+            "strategies": dict(strategy_counts),
+            "types": dict(type_counts)
+        }
         
         # Write to file
         with open(output_path, 'w') as f:
@@ -958,6 +957,30 @@ Return ONLY the JSON array, no additional text or explanation."""
         
         return report
 
+def run(document_path: str, config_path: str,
+        detector: Optional[PIIDetectorConfigGenerator] = None) -> Dict[str, Any]:
+    """
+    Detect PII in a document and write its configuration file, for in-process callers.
+    
+    Args:
+        document_path: Path to the input document (PDF, DOCX or TXT)
+        config_path: Path to write the configuration file
+        detector: Already initialized detector to reuse instead of loading the models
+        
+    Returns:
+        Detection statistics
+    """
+    if detector is None:
+        detector = PIIDetectorConfigGenerator()
+    
+    stats = detector.process_document(document_path, config_path)
+    
+    if stats["total_pii"] > 0:
+        report_path = config_path.replace('.txt', '_detection_report.txt')
+        detector.generate_detection_report(stats, report_path)
+    
+    return stats
+
 def main():
     """Main function for command-line usage."""
     print("PII Detection and Configuration Generator")
@@ -5,9 +5,12 @@ from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
 from langchain_core.messages import SystemMessage, HumanMessage
-import operator
+from langchain_core.prompts import ChatPromptTemplate
 from langchain_huggingface import HuggingFaceEmbeddings
 import os
+import re
+import json
+import hashlib
 from dotenv import load_dotenv
 
 # Load env
@@ -15,22 +18,69 @@ load_dotenv()
 os.environ["GOOGLE_API_KEY"] = os.getenv("GOOGLE_API_KEY")
 
 # ----- LLM -----
-llm = ChatOllama(model="phi3:latest")
-embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+# Keep the model loaded between calls so Ollama can reuse the KV cache of a
+# repeated prompt prefix; prompts put their stable text first for this reason
+llm = ChatOllama(model="phi3:latest", keep_alive="10m")
+# QA only has to judge, so it can run on a smaller model than generation
+judge_llm = ChatOllama(model=os.getenv("JUDGE_MODEL", "phi3:latest"), keep_alive="10m")
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))
+
+# Chunk rewrites kept across runs, one file per chunk named by the SHA-256 of
+# the model and the exact chunk text. Only the synthetic output is written;
+# the source text is never stored, and chunks that differ in any value miss
+RESPONSE_CACHE_DIR = "cache/chunk_responses"
+
+# Vector stores of documents already embedded, keyed by content hash
+VECTORSTORE_CACHE_DIR = "cache/vectorstores"
+
+# EMBEDDINGS_BACKEND=onnx runs the int8-quantised ONNX export that ships with
+# all-MiniLM-L6-v2 on ONNX Runtime, several times faster on CPU than the FP32
+# PyTorch model; it needs sentence-transformers[onnx] installed
+EMBEDDINGS_BACKEND = os.getenv("EMBEDDINGS_BACKEND", "torch")
+embedding_model_kwargs = {}
+if EMBEDDINGS_BACKEND == "onnx":
+    embedding_model_kwargs = {
+        "backend": "onnx",
+        "model_kwargs": {"file_name": "onnx/model_qint8_avx512_vnni.onnx"},
+    }
+
+# Large batches push many chunks through the model per forward pass;
+# normalised vectors make inner product equal cosine similarity
+embeddings = HuggingFaceEmbeddings(
+    model_name="all-MiniLM-L6-v2",
+    model_kwargs=embedding_model_kwargs,
+    encode_kwargs={"batch_size": 128, "normalize_embeddings": True},
+)
 
 # ----- Pre-processing: Chunk + Vector Store -----
 def build_vectorstore(raw_text: str):
+    # An unchanged document reloads its chunks and vectors instead of re-embedding
+    # (stored per backend, since quantised vectors differ slightly)
+    path = os.path.join(
+        VECTORSTORE_CACHE_DIR, EMBEDDINGS_BACKEND, hashlib.sha256(raw_text.encode("utf-8")).hexdigest()
+    )
+    if os.path.exists(path):
+        vectordb = FAISS.load_local(path, embeddings, allow_dangerous_deserialization=True)
+        chunks = [vectordb.docstore.search(vectordb.index_to_docstore_id[i]).page_content
+                  for i in range(vectordb.index.ntotal)]
+        return vectordb, chunks
+
     splitter = RecursiveCharacterTextSplitter(chunk_size=2000, chunk_overlap=200)
     chunks = splitter.split_text(raw_text)
-    vectordb = FAISS.from_texts(chunks, embeddings)
+    vectors = embeddings.embed_documents(chunks)
+    vectordb = FAISS.from_embeddings(list(zip(chunks, vectors)), embeddings)
+    vectordb.save_local(path)
     return vectordb, chunks
 
 # ----- State -----
+def merge_chunks(left: dict[int, str], right: dict[int, str]) -> dict[int, str]:
+    # Chunks are keyed by index, so updates from any number of nodes merge
+    # without re-copying a growing list and assemble in document order
+    return {**left, **right}
+
 class SyntheticState(TypedDict):
-    raw_text: str
-    vectordb: FAISS
     chunks: list[str]
-    synthetic_chunks: Annotated[list[str], operator.add]
+    synthetic_chunks: Annotated[dict[int, str], merge_chunks]
     synthetic_data: str
     qa_result: Literal["approved", "needs_fix"]
     feedback: str
@@ -38,62 +88,151 @@ class SyntheticState(TypedDict):
     max_iterations: int
 
 # ----- Agents -----
-def chunkwise_synthetic(state: SyntheticState):
-    synthetic_chunks = []
-    for idx, chunk in enumerate(state["chunks"]):
-        messages = [
-            SystemMessage(content="You are an expert at creating synthetic but realistic SEC filings."),
-            HumanMessage(content=f"""
+GENERATOR_SYSTEM_PROMPT = "You are an expert at creating synthetic but realistic SEC filings."
+QA_SYSTEM_PROMPT = "You are a QA agent verifying synthetic SEC filings."
+OPTIMIZER_SYSTEM_PROMPT = "You refine synthetic SEC filings."
+
+# Parsed once; each chunk only fills in the placeholders
+CHUNK_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", GENERATOR_SYSTEM_PROMPT),
+    ("human", """
 Rewrite the following section into a synthetic version:
 - Maintain overall structure, tone, and section purpose
 - Replace all sensitive values (names, amounts, dates, identifiers) with realistic but fake alternatives
 - Ensure consistency with typical SEC filing language
 - Do not shorten or summarize — produce roughly same length
 
-Section {idx+1}:
+Section {section}:
 {chunk}
-""")
-        ]
-        synthetic_chunks.append(llm.invoke(messages).content)
+"""),
+])
+
+FIX_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", OPTIMIZER_SYSTEM_PROMPT),
+    ("human", """
+Improve this section of a synthetic filing based on the feedback that follows it.
+Return only the improved section.
+
+Section {section}:
+{chunk}
+
+Feedback: {feedback}
+"""),
+])
+
+JSON_OBJECT_RE = re.compile(r"\{.*?\}", re.DOTALL)
+
+def response_cache_path(chunk: str) -> str:
+    key = hashlib.sha256(f"{llm.model}\0{chunk}".encode("utf-8")).hexdigest()
+    return os.path.join(RESPONSE_CACHE_DIR, f"{key}.txt")
+
+def load_cached_response(chunk: str):
+    try:
+        with open(response_cache_path(chunk), encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+def store_cached_response(chunk: str, response: str):
+    # Written under a temporary name and renamed, so a concurrent run never
+    # reads a partial entry
+    os.makedirs(RESPONSE_CACHE_DIR, exist_ok=True)
+    path = response_cache_path(chunk)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(response)
+    os.replace(tmp_path, path)
+
+def chunkwise_synthetic(state: SyntheticState):
+    chunks = state["chunks"]
+    synthetic_chunks = {}
+
+    # Reuse the rewrite of an identical chunk from an earlier run
+    misses = []
+    for idx, chunk in enumerate(chunks):
+        cached = load_cached_response(chunk)
+        if cached is not None:
+            synthetic_chunks[idx] = cached
+        else:
+            misses.append(idx)
+
+    # Chunks are independent, so run the calls concurrently; batch keeps input order
+    responses = llm.batch(
+        [CHUNK_PROMPT.format_messages(section=idx + 1, chunk=chunks[idx]) for idx in misses],
+        config={"max_concurrency": LLM_CONCURRENCY},
+    )
+    for idx, resp in zip(misses, responses):
+        synthetic_chunks[idx] = resp.content
+        store_cached_response(chunks[idx], resp.content)
+
     return {"synthetic_chunks": synthetic_chunks}
 
+def join_chunks(synthetic_chunks: dict[int, str]) -> str:
+    return "\n\n".join(synthetic_chunks[idx] for idx in sorted(synthetic_chunks))
+
 def assemble_synthetic(state: SyntheticState):
-    synthetic_data = "\n\n".join(state["synthetic_chunks"])
-    return {"synthetic_data": synthetic_data}
+    return {"synthetic_data": join_chunks(state["synthetic_chunks"])}
 
 def qa_synthetic(state: SyntheticState):
+    # Sections are numbered so the verdict can say which ones need fixing
+    synthetic_chunks = state["synthetic_chunks"]
+    sections = "\n\n".join(f"Section {idx+1}:\n{synthetic_chunks[idx]}" for idx in sorted(synthetic_chunks))
     messages = [
-        SystemMessage(content="You are a QA agent verifying synthetic SEC filings."),
+        SystemMessage(content=QA_SYSTEM_PROMPT),
         HumanMessage(content=f"""
 Review the following synthetic SEC filing:
-{state['synthetic_data']}
+{sections}
 
 Check for:
 - Real data leakage (e.g., actual company names or identifiers)
 - Structural consistency with real SEC filings
 - Tone, language, and formatting
-Return 'approved' or 'needs_fix' with reasoning.
+Start your answer with exactly APPROVED or NEEDS_FIX. After NEEDS_FIX, add one line of JSON
+listing the sections to fix, like {{"bad_sections": [2, 5], "notes": "what to fix"}}, then your reasoning.
 """)
     ]
-    resp = llm.invoke(messages).content
-    if "approved" in resp.lower():
-        return {"qa_result": "approved", "feedback": resp}
-    else:
-        return {"qa_result": "needs_fix", "feedback": resp}
+    # The verdict comes first: stop reading as soon as the filing is approved,
+    # and only read on for the reasoning the optimiser needs. The verdict is
+    # decided once, from the first len("APPROVED") non-blank characters.
+    parts = []
+    head = ""
+    for piece in judge_llm.stream(messages):
+        parts.append(piece.content)
+        if head is None:
+            continue
+        head = (head + piece.content).lstrip()
+        if len(head) >= len("APPROVED"):
+            if head[:len("APPROVED")].upper() == "APPROVED":
+                return {"qa_result": "approved", "feedback": "".join(parts)}
+            head = None
+    return {"qa_result": "needs_fix", "feedback": "".join(parts)}
 
-def optimize_synthetic(state: SyntheticState):
-    messages = [
-        SystemMessage(content="You refine synthetic SEC filings."),
-        HumanMessage(content=f"""
-Improve the synthetic filing below based on the feedback:
-Feedback: {state['feedback']}
+def parse_bad_sections(feedback: str, count: int) -> list[int]:
+    # Chunk indices of the sections QA flagged; every section when the
+    # verdict has no usable list
+    match = JSON_OBJECT_RE.search(feedback)
+    try:
+        sections = json.loads(match.group(0))["bad_sections"]
+        bad = sorted({int(section) - 1 for section in sections} & set(range(count)))
+    except (AttributeError, KeyError, TypeError, ValueError):
+        bad = []
+    return bad or list(range(count))
 
-Filing:
-{state['synthetic_data']}
-""")
-    ]
-    new_data = llm.invoke(messages).content
-    return {"synthetic_data": new_data, "iteration": state["iteration"] + 1}
+def optimize_synthetic(state: SyntheticState):
+    # Only the flagged sections are sent back, rather than the whole filing
+    synthetic_chunks = state["synthetic_chunks"]
+    bad = parse_bad_sections(state["feedback"], len(synthetic_chunks))
+    responses = llm.batch(
+        [FIX_PROMPT.format_messages(section=idx + 1, chunk=synthetic_chunks[idx], feedback=state["feedback"])
+         for idx in bad],
+        config={"max_concurrency": LLM_CONCURRENCY},
+    )
+    fixed = {idx: resp.content for idx, resp in zip(bad, responses)}
+    return {
+        "synthetic_chunks": fixed,
+        "synthetic_data": join_chunks({**synthetic_chunks, **fixed}),
+        "iteration": state["iteration"] + 1,
+    }
 
 # ----- Routing -----
 def route_qa(state: SyntheticState):
@@ -117,12 +256,13 @@ graph.add_edge("optimize", "qa")
 workflow = graph.compile()
 
 # ----- Usage -----
-raw_doc = open("input/big_doc.txt").read()
+# The splitter needs the text as one str, so the file is read once and
+# closed straight away; an mmap would still have to be decoded into a copy
+with open("input/big_doc.txt", encoding="utf-8") as f:
+    raw_doc = f.read()
 vectordb, chunks = build_vectorstore(raw_doc)
 
 initial_state = {
-    "raw_text": raw_doc,
-    "vectordb": vectordb,
     "chunks": chunks,
     "iteration": 1,
     "max_iterations": 3
@@ -11,16 +11,25 @@ Flow:
 """
 
 import os
+import sys
 import uuid
+import hashlib
+import itertools
 import subprocess
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, Any, List
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, List, Tuple, Optional
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from flask import Blueprint, request, current_app, send_file
 from werkzeug.utils import secure_filename
 from werkzeug.datastructures import FileStorage
-from utils.responses import success_response, error_response
-from utils.helpers import get_current_timestamp
+from werkzeug.exceptions import RequestEntityTooLarge
+from utils.responses import success_response, streamed_success_response, error_response
+from utils.helpers import (
+    get_current_timestamp, calculate_file_hash, write_text_atomic, sniff_content_type, SNIFF_HEADER_SIZE
+)
 from mongodb import get_mongo_db
 
 simple_processing_bp = Blueprint('simple_processing', __name__)
@@ -35,9 +44,363 @@ UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
 CONFIGS_DIR.mkdir(parents=True, exist_ok=True)
 RESULTS_DIR.mkdir(parents=True, exist_ok=True)
 
+# Supported upload formats and their MIME types
+MIME_TYPES = {
+    '.pdf': 'application/pdf',
+    '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    '.txt': 'text/plain'
+}
+
+# Suffixes of uploaded documents and their converted temporaries
+UPLOAD_FILE_SUFFIXES = tuple(MIME_TYPES)
+
+# Types the magic bytes of binary upload formats may be recognised as. A
+# .docx is a zip archive that is only named as such when word/ appears in its
+# first bytes. Uploads recognised as anything else are rejected.
+SNIFFED_TYPES = {
+    '.pdf': frozenset({'application/pdf'}),
+    '.docx': frozenset({MIME_TYPES['.docx'], 'application/zip'})
+}
+
+# Uploads are copied to disk in chunks of this size
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Uploads copied to disk at the same time, so a burst of large uploads
+# cannot exhaust disk bandwidth before masking starts
+MAX_CONCURRENT_UPLOADS = int(os.getenv('MAX_CONCURRENT_UPLOADS', '4'))
+_upload_slots = threading.BoundedSemaphore(MAX_CONCURRENT_UPLOADS)
+
+# Uploaded originals never change under their document ID, so browsers may
+# reuse a preview for this long without revalidating
+ORIGINAL_PREVIEW_MAX_AGE = 3600
+
+# Default page size of the MongoDB debug listings
+DEBUG_LIST_LIMIT = 100
+
+# Batches at least this large return their summary as a streamed JSON body
+STREAMING_RESPONSE_THRESHOLD = 50
+
 # MongoDB instance (still used for data persistence)
 mongo_db = get_mongo_db()
 
+# Run PII detection and masking as separate script processes instead of
+# in-process, e.g. to isolate a misbehaving model while debugging
+PII_SUBPROCESS_MODE = os.getenv('PII_SUBPROCESS_MODE', 'false').lower() in ('1', 'true', 'yes')
+
+
+def _pii_detector_version() -> str:
+    """Version of the PII detector: PII_DETECTOR_VERSION plus a digest of its source."""
+    script_path = Path(__file__).resolve().parent.parent / 'scripts' / 'pii_detector_config_generator.py'
+    try:
+        with open(script_path, 'rb') as f:
+            source_digest = hashlib.file_digest(f, 'sha256').hexdigest()[:16]
+    except OSError:
+        source_digest = 'unknown'
+    return f"{os.getenv('PII_DETECTOR_VERSION', '1')}-{source_digest}"
+
+
+# Cached PII configs are only reused by the detector that generated them.
+# Edits to the detector script change it; set PII_DETECTOR_VERSION when the
+# model or its dependencies change instead
+PII_DETECTOR_VERSION = _pii_detector_version()
+
+# Processes the masker may use to extract text from a large PDF
+MASKING_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+
+# Shared PDF scan detector, created on first use
+_scan_detector = None
+_scan_detector_lock = threading.Lock()
+
+# Shared PII detector and masker, so their models are loaded once per process
+_pii_detector = None
+_pii_detector_lock = threading.Lock()
+_pii_masker = None
+_pii_masker_lock = threading.Lock()
+
+
+def get_scan_detector():
+    """Get the shared PDFScanDetector instance, creating it on first use."""
+    global _scan_detector
+    if _scan_detector is None:
+        with _scan_detector_lock:
+            if _scan_detector is None:
+                from scripts.pdf_scan_detector import PDFScanDetector
+                _scan_detector = PDFScanDetector()
+    return _scan_detector
+
+
+def get_pii_detector():
+    """Get the shared PIIDetectorConfigGenerator instance, creating it on first use."""
+    global _pii_detector
+    if _pii_detector is None:
+        with _pii_detector_lock:
+            if _pii_detector is None:
+                try:
+                    from scripts.pii_detector_config_generator import PIIDetectorConfigGenerator
+                except SystemExit:
+                    raise ImportError("PII detector dependencies are not installed")
+                _pii_detector = PIIDetectorConfigGenerator()
+    return _pii_detector
+
+
+def get_pii_masker():
+    """Get the shared BERTPIIMasker instance whose NER model is reused across documents."""
+    global _pii_masker
+    if _pii_masker is None:
+        with _pii_masker_lock:
+            if _pii_masker is None:
+                try:
+                    from scripts.bert_pii_masker import BERTPIIMasker
+                except SystemExit:
+                    raise ImportError("PII masker dependencies are not installed")
+                _pii_masker = BERTPIIMasker()
+    return _pii_masker
+
+
+# Persistent worker pools shared by all requests, so batch operations do not
+# start threads per call. Their sizes also cap concurrent work process-wide.
+IO_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix='infowise-io')
+DETECTION_POOL = ThreadPoolExecutor(max_workers=5, thread_name_prefix='infowise-detection')
+MASKING_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix='infowise-masking')
+
+# Background detection and masking of documents queued with
+# /process-document?async=true, keyed by document ID for /status
+PROCESSING_JOB_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix='infowise-jobs')
+MAX_TRACKED_PROCESSING_JOBS = 1024
+_processing_jobs: Dict[str, Future] = {}
+_processing_jobs_lock = threading.Lock()
+
+# Bulk config generation and masking submitted with ?async=true, keyed by
+# task ID for /task/<task_id>; they share PROCESSING_JOB_POOL
+_tasks: Dict[str, Future] = {}
+_tasks_lock = threading.Lock()
+
+# Background uploads of original and masked files to MongoDB on IO_POOL,
+# keyed by (document ID, status), so responses do not wait for GridFS writes
+MONGO_UPLOAD_ATTEMPTS = 3
+MAX_TRACKED_MONGO_UPLOADS = 1024
+_pending_mongo_uploads: Dict[Tuple[str, str], Future] = {}
+_pending_mongo_uploads_lock = threading.Lock()
+
+
+def _store_file_with_retry(app, f, file_info: Dict[str, Any], transient: bool) -> str:
+    """Stream an open file into MongoDB, retrying with exponential backoff."""
+    with app.app_context():
+        for attempt in range(MONGO_UPLOAD_ATTEMPTS):
+            try:
+                f.seek(0)
+                mongo_doc_id = mongo_db.store_file(file_data=f, file_info=file_info, transient=transient)
+                invalidate_mongo_info(file_info['metadata']['document_id'])
+                current_app.logger.info(f"{file_info['status'].capitalize()} file stored in MongoDB with ID: {mongo_doc_id}")
+                return mongo_doc_id
+            except Exception as e:
+                current_app.logger.error(f"MongoDB storage failed for {file_info['status']} file (attempt {attempt + 1}): {e}")
+                if attempt == MONGO_UPLOAD_ATTEMPTS - 1:
+                    raise
+                time.sleep(2 ** attempt)
+
+
+def submit_mongo_upload(document_id: str, path: Path, file_info: Dict[str, Any], transient: bool = False) -> str:
+    """
+    Queue the MongoDB upload of a local file in the background.
+    
+    The file is opened here, so the upload still reads this content if the
+    local copy is removed or replaced before the upload starts. Pass
+    transient=True for intermediate files, which are then written with
+    MongoDB's relaxed transient write concern.
+    
+    Returns:
+        'pending' once queued, or 'disabled' when STORE_IN_MONGO is off
+    """
+    if not current_app.config.get('STORE_IN_MONGO', True):
+        return 'disabled'
+    
+    f = open(path, 'rb')
+    file_info['file_size'] = os.fstat(f.fileno()).st_size
+    future = IO_POOL.submit(_store_file_with_retry, current_app._get_current_object(), f, file_info, transient)
+    future.add_done_callback(lambda _: f.close())
+    
+    key = (document_id, file_info['status'])
+    with _pending_mongo_uploads_lock:
+        if len(_pending_mongo_uploads) >= MAX_TRACKED_MONGO_UPLOADS:
+            for done_key in [k for k, pending in _pending_mongo_uploads.items() if pending.done()]:
+                del _pending_mongo_uploads[done_key]
+        _pending_mongo_uploads[key] = future
+    return 'pending'
+
+
+def get_mongo_upload_status(document_id: str, status: str) -> Optional[Dict[str, Any]]:
+    """Get the state of the background MongoDB upload of a document's file, if any."""
+    with _pending_mongo_uploads_lock:
+        future = _pending_mongo_uploads.get((document_id, status))
+    
+    if future is None:
+        return None
+    if future.cancelled():
+        return {'status': 'cancelled'}
+    if not future.done():
+        return {'status': 'pending'}
+    
+    error = future.exception()
+    if error is not None:
+        return {'status': 'failed', 'error': str(error)}
+    return {'status': 'completed', 'mongo_id': future.result()}
+
+
+def settle_mongo_uploads(document_id: str, status: Optional[str] = None) -> None:
+    """
+    Settle a document's background MongoDB uploads before deleting its records.
+    
+    Queued uploads are cancelled; running ones are awaited so their records
+    exist when the delete runs. Only running uploads are awaited, so callers
+    on IO_POOL cannot deadlock waiting for work queued behind them.
+    """
+    with _pending_mongo_uploads_lock:
+        futures = [
+            future for (pending_id, pending_status), future in _pending_mongo_uploads.items()
+            if pending_id == document_id and status in (None, pending_status)
+        ]
+    
+    for future in futures:
+        if not future.cancel():
+            try:
+                future.result()
+            except Exception:
+                pass  # Failure is already logged and reported by /status
+
+
+# Short-lived cache of MongoDB file listings keyed by (document ID, status),
+# so dashboards polling /status do not query MongoDB on every request.
+# Writes and deletes made by this process invalidate entries immediately.
+MONGO_INFO_CACHE_TTL = 3.0
+MONGO_INFO_CACHE_SIZE = 1024
+_mongo_info_cache: "OrderedDict[Tuple[str, Optional[str]], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+_mongo_info_lock = threading.Lock()
+
+
+def invalidate_mongo_info(document_id: str) -> None:
+    """Drop cached MongoDB listings for a document after its files change."""
+    with _mongo_info_lock:
+        for key in [key for key in _mongo_info_cache if key[0] == document_id]:
+            del _mongo_info_cache[key]
+
+
+# LRU cache of scan analyses keyed by PDF content hash, so re-uploads of the
+# same PDF under a new document ID skip the analysis
+SCAN_ANALYSIS_CACHE_SIZE = 1024
+_scan_analysis_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_scan_analysis_lock = threading.Lock()
+
+
+def analyze_pdf_cached(pdf_path: Path) -> Dict[str, Any]:
+    """Analyze whether a PDF is scanned, reusing results for identical content."""
+    content_hash = calculate_file_hash(str(pdf_path))
+    
+    with _scan_analysis_lock:
+        analysis = _scan_analysis_cache.get(content_hash)
+        if analysis is not None:
+            _scan_analysis_cache.move_to_end(content_hash)
+            return dict(analysis)
+    
+    analysis = get_scan_detector().analyze_pdf(str(pdf_path))
+    
+    with _scan_analysis_lock:
+        _scan_analysis_cache[content_hash] = analysis
+        if len(_scan_analysis_cache) > SCAN_ANALYSIS_CACHE_SIZE:
+            _scan_analysis_cache.popitem(last=False)
+    
+    return dict(analysis)
+
+
+# LRU cache of parsed config files keyed by (path, mtime, size), so repeated
+# reads of an unchanged config skip parsing; rewrites invalidate naturally
+CONFIG_PARSE_CACHE_SIZE = 128
+_config_parse_cache: "OrderedDict[Tuple[str, int, int], List[Dict[str, Any]]]" = OrderedDict()
+_config_parse_lock = threading.Lock()
+
+
+def _copy_config_items(config_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Copy parsed config items so callers cannot mutate cached entries."""
+    return [{**item, 'coordinates': dict(item['coordinates'])} for item in config_data]
+
+
+# LRU indexes of documents handled by this process. Upload paths spare
+# lookups by document ID a scan of the uploads directory; content hashes are
+# taken while uploads are streamed to disk, so config cache lookups need not
+# re-read them. Evicted entries fall back to those slower paths.
+DOCUMENT_INDEX_SIZE = 4096
+_document_paths: "OrderedDict[str, Path]" = OrderedDict()
+_document_hashes: "OrderedDict[str, str]" = OrderedDict()
+_document_index_lock = threading.Lock()
+
+
+def _index_get(index: "OrderedDict[str, Any]", document_id: str) -> Optional[Any]:
+    """Look up a document in one of the document indexes."""
+    with _document_index_lock:
+        value = index.get(document_id)
+        if value is not None:
+            index.move_to_end(document_id)
+        return value
+
+
+def _index_put(index: "OrderedDict[str, Any]", document_id: str, value: Any) -> None:
+    """Record a document in one of the document indexes, evicting the least recently used."""
+    with _document_index_lock:
+        index[document_id] = value
+        index.move_to_end(document_id)
+        if len(index) > DOCUMENT_INDEX_SIZE:
+            index.popitem(last=False)
+
+
+def forget_documents(document_ids) -> None:
+    """Drop documents from the document indexes after their files are removed."""
+    with _document_index_lock:
+        for document_id in document_ids:
+            _document_paths.pop(document_id, None)
+            _document_hashes.pop(document_id, None)
+
+
+def find_document_files(directory: Path, document_id: str, suffixes: Tuple[str, ...]) -> List[str]:
+    """List a document's files in a directory with a single scandir pass, matching suffixes case-insensitively."""
+    prefix = f"{document_id}_"
+    with os.scandir(directory) as entries:
+        return [
+            entry.path for entry in entries
+            if entry.name.startswith(prefix) and entry.name.lower().endswith(suffixes)
+        ]
+
+
+def config_file_paths(document_id: str) -> List[str]:
+    """Paths of the config file and detection report generated for a document."""
+    return [
+        str(CONFIGS_DIR / f"{document_id}_pii_config.txt"),
+        str(CONFIGS_DIR / f"{document_id}_pii_config_detection_report.txt")
+    ]
+
+
+def remove_files(paths: List[str]) -> Tuple[List[str], List[Tuple[str, str]]]:
+    """
+    Delete a batch of files in a single pass.
+
+    Args:
+        paths: File paths to delete
+
+    Returns:
+        Tuple of (removed paths, list of (path, error message) for failures)
+    """
+    removed = []
+    failed = []
+    for path in paths:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            continue  # Already removed by a concurrent cleanup
+        except OSError as e:
+            failed.append((path, str(e)))
+            continue
+        removed.append(path)
+    return removed, failed
+
 
 class SimpleDocumentProcessor:
     """Simplified document processing without JWT complexity."""
@@ -68,65 +431,79 @@ class SimpleDocumentProcessor:
                 raise ValueError("Invalid filename")
             
             # Check for supported file types
-            supported_extensions = ['.pdf', '.docx', '.txt']
-            file_extension = os.path.splitext(filename)[1].lower()
-            if file_extension not in supported_extensions:
+            file_extension = os.path.splitext(filename)[1]
+            mime_type = MIME_TYPES.get(file_extension.lower())
+            if mime_type is None:
                 raise ValueError("Only PDF, Word (.docx), and text (.txt) files are supported")
             
             # Generate unique document ID
             doc_id = self.generate_document_id()
             
             # Create unique filename
-            file_extension = os.path.splitext(filename)[1]
             unique_filename = f"{doc_id}_{filename}"
             
-            # Determine MIME type based on extension
-            mime_type_map = {
-                '.pdf': 'application/pdf',
-                '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-                '.txt': 'text/plain'
-            }
-            mime_type = mime_type_map.get(file_extension.lower(), 'application/octet-stream')
-            
-            # Save locally
-            local_path = UPLOADS_DIR / unique_filename
-            file.save(str(local_path))
-            
-            # Read file data for MongoDB
-            with open(local_path, 'rb') as f:
-                file_data = f.read()
-            
-            # Store in MongoDB
+            # Bound concurrent disk copies across request threads
+            with _upload_slots:
+                # The content type is sniffed from the first chunk of the same
+                # pass, before anything is written
+                first_chunk = file.stream.read(UPLOAD_CHUNK_SIZE)
+                detected_type = sniff_content_type(first_chunk[:SNIFF_HEADER_SIZE])
+                allowed_types = SNIFFED_TYPES.get(file_extension.lower())
+                if detected_type is not None and allowed_types is not None and detected_type not in allowed_types:
+                    raise ValueError(f"File content ({detected_type}) does not match its {file_extension} extension")
+                
+                # Save locally in chunks, hashing as we go, so a large upload
+                # is never held in memory. The content hash is used to reuse
+                # PII configs for identical documents.
+                local_path = UPLOADS_DIR / unique_filename
+                hasher = hashlib.sha256()
+                file_size = 0
+                with open(local_path, 'wb') as f:
+                    chunks = itertools.chain((first_chunk,), iter(lambda: file.stream.read(UPLOAD_CHUNK_SIZE), b''))
+                    for chunk in chunks:
+                        hasher.update(chunk)
+                        f.write(chunk)
+                        file_size += len(chunk)
+                content_hash = hasher.hexdigest()
+                _index_put(_document_paths, doc_id, local_path)
+                _index_put(_document_hashes, doc_id, content_hash)
+            
+            # One timestamp for both the MongoDB record and the response
+            upload_date = get_current_timestamp()
+            
+            # Store in MongoDB in the background, streaming from the saved
+            # copy; /status reports the upload state
             try:
-                mongo_doc_id = mongo_db.store_file(
-                    file_data=file_data,
-                    file_info={
-                        'original_name': filename,
-                        'file_size': len(file_data),
-                        'status': 'uploaded',
-                        'file_type': file_extension,
-                        'mime_type': mime_type,
-                        'user_id': '41d52297-aaed-4985-b403-2ce3aa9cf124', 
-                        'upload_date': get_current_timestamp(),
-                        'metadata': {
-                            'local_path': str(local_path),
-                            'document_id': doc_id
-                        }
+                mongo_upload = submit_mongo_upload(doc_id, local_path, {
+                    'original_name': filename,
+                    'file_size': file_size,
+                    'status': 'uploaded',
+                    'file_type': file_extension,
+                    'mime_type': mime_type,
+                    'user_id': '41d52297-aaed-4985-b403-2ce3aa9cf124', 
+                    'upload_date': upload_date,
+                    'metadata': {
+                        'local_path': str(local_path),
+                        'document_id': doc_id,
+                        'content_hash': content_hash,
+                        'detected_content_type': detected_type
                     }
-                )
-                current_app.logger.info(f"Original file stored in MongoDB with ID: {mongo_doc_id}")
+                }, transient=True)
             except Exception as e:
                 current_app.logger.error(f"MongoDB storage failed: {e}")
-                mongo_doc_id = None
+                mongo_upload = 'failed'
             
             return {
                 'document_id': doc_id,
                 'filename': filename,
                 'original_name': filename,
-                'size': len(file_data),
+                'size': file_size,
+                'content_hash': content_hash,
+                'detected_content_type': detected_type,
                 'local_path': str(local_path),
-                'mongo_id': mongo_doc_id,
-                'upload_date': get_current_timestamp(),
+                'mongo_id': None,
+                'mongo_upload': mongo_upload,
+                'upload_date': upload_date,
                 'status': 'uploaded'
             }
             
@@ -150,17 +527,31 @@ class SimpleDocumentProcessor:
             uploaded_documents = []
             failed_uploads = []
             
-            for file in files:
-                try:
-                    result = self.upload_document(file)
+            # Capture current Flask app context for worker threads
+            app = current_app._get_current_object()
+            
+            def upload_with_context(file: FileStorage):
+                """Wrapper function that preserves Flask app context."""
+                with app.app_context():
+                    try:
+                        return self.upload_document(file), None
+                    except Exception as e:
+                        return None, e
+            
+            # Uploads are disk and MongoDB bound, so they overlap well in threads.
+            # The pool size also bounds how many upload buffers are held at once.
+            upload_results = list(IO_POOL.map(upload_with_context, files))
+            
+            for file, (result, error) in zip(files, upload_results):
+                if error is None:
                     uploaded_documents.append(result)
                     current_app.logger.info(f"Successfully uploaded: {result['filename']}")
-                except Exception as e:
+                else:
                     failed_uploads.append({
                         'filename': file.filename if file and file.filename else 'unknown',
-                        'error': str(e)
+                        'error': str(error)
                     })
-                    current_app.logger.error(f"Failed to upload {file.filename if file and file.filename else 'unknown'}: {str(e)}")
+                    current_app.logger.error(f"Failed to upload {file.filename if file and file.filename else 'unknown'}: {str(error)}")
             
             return {
                 'uploaded_documents': uploaded_documents,
@@ -187,12 +578,12 @@ class SimpleDocumentProcessor:
         """
         try:
             # Find the uploaded PDF file
-            uploaded_files = list(UPLOADS_DIR.glob(f"{document_id}_*.pdf"))
+            uploaded_files = find_document_files(UPLOADS_DIR, document_id, ('.pdf',))
             
             if not uploaded_files:
                 raise ValueError(f"PDF file not found for document_id: {document_id}")
             
-            original_pdf_path = uploaded_files[0]
+            original_pdf_path = Path(uploaded_files[0])
             
             # Create OCR output path (text file)
             ocr_filename = f"{document_id}_ocr_extracted.txt"
@@ -217,36 +608,41 @@ class SimpleDocumentProcessor:
             original_pdf_path.rename(backup_path)
             current_app.logger.info(f"Original scanned PDF backed up as: {backup_path}")
             
+            processing_date = get_current_timestamp()
+            
             # Store OCR text file in MongoDB
-            try:
-                with open(ocr_output_path, 'r', encoding='utf-8') as f:
-                    text_data = f.read()
+            mongo_doc_id = None
+            if current_app.config.get('STORE_IN_MONGO', True):
+                try:
+                    with open(ocr_output_path, 'r', encoding='utf-8') as f:
+                        text_data = f.read()
                 
-                # Store as binary data for consistency with other files
-                text_bytes = text_data.encode('utf-8')
+                    # Store as binary data for consistency with other files
+                    text_bytes = text_data.encode('utf-8')
                 
-                mongo_doc_id = mongo_db.store_file(
-                    file_data=text_bytes,
-                    file_info={
-                        'original_name': ocr_filename,
-                        'file_size': len(text_bytes),
-                        'status': 'ocr_processed',
-                        'file_type': '.txt',
-                        'mime_type': 'text/plain',
-                        'user_id': '41d52297-aaed-4985-b403-2ce3aa9cf124',
-                        'upload_date': get_current_timestamp(),
-                        'metadata': {
-                            'local_path': str(ocr_output_path),
-                            'document_id': document_id,
-                            'processing_type': 'ocr_extracted_text',
-                            'original_scanned_backup': str(backup_path)
-                        }
-                    }
-                )
-                current_app.logger.info(f"OCR text file stored in MongoDB with ID: {mongo_doc_id}")
-            except Exception as e:
-                current_app.logger.error(f"MongoDB storage of OCR text failed: {e}")
-                mongo_doc_id = None
+                    mongo_doc_id = mongo_db.store_file(
+                        file_data=text_bytes,
+                        file_info={
+                            'original_name': ocr_filename,
+                            'file_size': len(text_bytes),
+                            'status': 'ocr_processed',
+                            'file_type': '.txt',
+                            'mime_type': 'text/plain',
+                            'user_id': '41d52297-aaed-4985-b403-2ce3aa9cf124',
+                            'upload_date': processing_date,
+                            'metadata': {
+                                'local_path': str(ocr_output_path),
+                                'document_id': document_id,
+                                'processing_type': 'ocr_extracted_text',
+                                'original_scanned_backup': str(backup_path)
+                            }
+                        },
+                        transient=True
+                    )
+                    invalidate_mongo_info(document_id)
+                    current_app.logger.info(f"OCR text file stored in MongoDB with ID: {mongo_doc_id}")
+                except Exception as e:
+                    current_app.logger.error(f"MongoDB storage of OCR text failed: {e}")
             
             return {
                 'document_id': document_id,
@@ -255,48 +651,68 @@ class SimpleDocumentProcessor:
                 'mongo_id': mongo_doc_id,
                 'status': 'ocr_completed',
                 'output_type': 'text_file',
-                'processing_date': get_current_timestamp()
+                'processing_date': processing_date
             }
             
         except Exception as e:
             raise ValueError(f"OCR processing failed: {str(e)}")
 
-    def generate_pii_config(self, document_id: str) -> Dict[str, Any]:
+    def _find_document_file(self, document_id: str) -> Path:
+        """Find the uploaded document file for a document ID."""
+        document_path = _index_get(_document_paths, document_id)
+        if document_path is None:
+            # Use the path recorded in MongoDB at upload time, e.g. for
+            # documents uploaded through another worker process
+            try:
+                local_path = mongo_db.get_local_path(document_id)
+            except RuntimeError:
+                local_path = None
+            if local_path:
+                document_path = Path(local_path)
+        
+        if document_path is not None and document_path.is_file():
+            _index_put(_document_paths, document_id, document_path)
+            return document_path
+        
+        # Look for files that start with document_id_ (original naming pattern)
+        uploaded_files = find_document_files(UPLOADS_DIR, document_id, UPLOAD_FILE_SUFFIXES)
+        
+        if not uploaded_files:
+            raise ValueError(f"Document file not found for document_id: {document_id}")
+        
+        # Index the hit so repeated status polls and previews skip the scan
+        document_path = Path(uploaded_files[0])
+        _index_put(_document_paths, document_id, document_path)
+        return document_path
+    
+    def generate_pii_config(self, document_id: str, cached_config: Optional[str] = None) -> Dict[str, Any]:
         """
         Generate PII configuration using pii_detector_config_generator.py
         This method now includes automatic scanned PDF detection and OCR processing.
         
         Args:
             document_id: Document ID from upload
+            cached_config: Previously generated config text for identical content.
+                When given, detection is skipped and the cached config is reused.
+                Only configs of documents processed directly are cached, so a
+                hit never bypasses OCR.
             
         Returns:
             Dictionary with config generation results
         """
         try:
-            # Find the uploaded file - support multiple extensions
-            # Look for files that start with document_id_ (original naming pattern)
-            uploaded_files = list(UPLOADS_DIR.glob(f"{document_id}_*"))
+            if cached_config is not None:
+                return self._restore_cached_config(document_id, cached_config)
             
-            # Filter to only include supported file types
-            supported_extensions = ['.pdf', '.docx', '.txt']
-            uploaded_files = [f for f in uploaded_files if f.suffix.lower() in supported_extensions]
-            
-            if not uploaded_files:
-                raise ValueError(f"Document file not found for document_id: {document_id}")
-            
-            document_path = uploaded_files[0]
+            document_path = self._find_document_file(document_id)
             
             # Check if PDF is scanned and needs OCR processing
             ocr_processed = False
             if document_path.suffix.lower() == '.pdf':
                 current_app.logger.info(f"Checking if PDF is scanned: {document_path}")
                 
-                # Import and use the PDF scan detector  
-                from scripts.pdf_scan_detector import PDFScanDetector
-                detector = PDFScanDetector()
-                
                 # Analyze PDF to determine if it's scanned
-                analysis = detector.analyze_pdf(str(document_path))
+                analysis = analyze_pdf_cached(document_path)
                 
                 current_app.logger.info(f"PDF scan analysis: {analysis['analysis_details']}")
                 
@@ -327,16 +743,26 @@ class SimpleDocumentProcessor:
             current_app.logger.info(f"Absolute document path: {absolute_document_path}")
             current_app.logger.info(f"Document exists: {absolute_document_path.exists()}")
             
-            result = subprocess.run([
-                'python', 'scripts/pii_detector_config_generator.py',
-                str(absolute_document_path),
-                str(absolute_config_path)
-            ], capture_output=True, text=True, cwd=current_app.root_path)
-            
-            if result.returncode != 0:
-                raise ValueError(f"PII detection failed: {result.stderr}")
-            
-            current_app.logger.info(f"PII detection completed: {result.stdout}")
+            if PII_SUBPROCESS_MODE:
+                result = subprocess.run([
+                    'python', 'scripts/pii_detector_config_generator.py',
+                    str(absolute_document_path),
+                    str(absolute_config_path)
+                ], capture_output=True, text=True, cwd=current_app.root_path)
+                
+                if result.returncode != 0:
+                    raise ValueError(f"PII detection failed: {result.stderr}")
+                
+                current_app.logger.info(f"PII detection completed: {result.stdout}")
+            else:
+                from scripts.pii_detector_config_generator import run as run_detector
+                try:
+                    stats = run_detector(str(absolute_document_path), str(absolute_config_path),
+                                         detector=get_pii_detector())
+                except Exception as e:
+                    raise ValueError(f"PII detection failed: {str(e)}")
+                
+                current_app.logger.info(f"PII detection completed: {stats['total_pii']} PII found")
             
             # Read and parse the generated config
             if not config_path.exists():
@@ -369,8 +795,48 @@ class SimpleDocumentProcessor:
             raise ValueError(f"Config generation failed: {str(e)}")
     
     
+    def _restore_cached_config(self, document_id: str, config_text: str) -> Dict[str, Any]:
+        """Write a cached config for a document instead of re-running detection."""
+        config_path = CONFIGS_DIR / f"{document_id}_pii_config.txt"
+        write_text_atomic(str(config_path), config_text)
+        
+        current_app.logger.info(f"Reused cached PII config for document: {document_id}")
+        config_data = self._parse_config_file(config_path)
+        
+        return {
+            'document_id': document_id,
+            'config_path': str(config_path),
+            'config_data': config_data,
+            'total_pii': len(config_data),
+            'status': 'config_generated',
+            'cache_hit': True,
+            'ocr_processed': False,
+            'processing_note': 'PII configuration reused from an identical previously processed document',
+            'processing_type': 'cached'
+        }
+    
     def _parse_config_file(self, config_path: Path) -> List[Dict[str, Any]]:
-        """Parse the PII config file into structured data."""
+        """Parse the PII config file into structured data, reusing cached results."""
+        stat = config_path.stat()
+        cache_key = (str(config_path.resolve()), stat.st_mtime_ns, stat.st_size)
+        
+        with _config_parse_lock:
+            config_data = _config_parse_cache.get(cache_key)
+            if config_data is not None:
+                _config_parse_cache.move_to_end(cache_key)
+                return _copy_config_items(config_data)
+        
+        config_data = self._read_config_file(config_path)
+        
+        with _config_parse_lock:
+            _config_parse_cache[cache_key] = config_data
+            if len(_config_parse_cache) > CONFIG_PARSE_CACHE_SIZE:
+                _config_parse_cache.popitem(last=False)
+        
+        return _copy_config_items(config_data)
+    
+    def _read_config_file(self, config_path: Path) -> List[Dict[str, Any]]:
+        """Read and parse the PII config file line by line."""
         config_data = []
         
         with open(config_path, 'r') as f:
@@ -384,32 +850,32 @@ class SimpleDocumentProcessor:
                 try:
                     # Parse format: PII_TEXT:TYPE:STRATEGY:PAGE:X0:Y0:X1:Y1
                     # Handle cases where PII text might contain colons (like URLs, times, etc.)
-                    parts = line.split(':')
-                    if len(parts) >= 8:
+                    # rsplit keeps any colons in the text itself in the first field
+                    parts = line.rsplit(':', 7)
+                    if len(parts) == 8:
                         # Standard format with all coordinates
-                        # Reconstruct text in case it contains colons
-                        text = ':'.join(parts[:-7])  # Everything except last 7 parts
+                        text, pii_type, strategy, page, x0, y0, x1, y1 = parts
                         pii_item = {
                             'id': f"pii_{line_num}",
                             'text': text,
-                            'type': parts[-7],
-                            'strategy': parts[-6],
-                            'page': int(parts[-5]),
+                            'type': pii_type,
+                            'strategy': strategy,
+                            'page': int(page),
                             'coordinates': {
-                                'x0': float(parts[-4]),
-                                'y0': float(parts[-3]),
-                                'x1': float(parts[-2]),
-                                'y1': float(parts[-1]),
+                                'x0': float(x0),
+                                'y0': float(y0),
+                                'x1': float(x1),
+                                'y1': float(y1),
                             }
                         }
                     elif len(parts) >= 3:
                         # Minimal format: TEXT:TYPE:STRATEGY
-                        text = ':'.join(parts[:-2])  # Everything except last 2 parts
+                        text, pii_type, strategy = line.rsplit(':', 2)
                         pii_item = {
                             'id': f"pii_{line_num}",
                             'text': text,
-                            'type': parts[-2],
-                            'strategy': parts[-1],
+                            'type': pii_type,
+                            'strategy': strategy,
                             'page': 0,
                             'coordinates': {
                                 'x0': 0.0,
@@ -454,20 +920,22 @@ class SimpleDocumentProcessor:
             config_filename = f"{document_id}_pii_config.txt"
             config_path = CONFIGS_DIR / config_filename
             
-            # Write updated config file
-            with open(config_path, 'w') as f:
-                f.write("# Updated PII Masking Configuration File\n")
-                f.write("# Format: PII_TEXT:TYPE:STRATEGY:PAGE:X0:Y0:X1:Y1\n")
-                f.write("#\n")
-                
-                for pii_item in config_data:
-                    coords = pii_item.get('coordinates', {})
-                    # Handle both 'strategy' and 'suggested_strategy' fields
-                    strategy = pii_item.get('strategy', pii_item.get('suggested_strategy', 'redact'))
-                    line = (f"{pii_item['text']}:{pii_item['type']}:{strategy}:"
-                           f"{pii_item.get('page', 0)}:{coords.get('x0', 0.0)}:"
-                           f"{coords.get('y0', 0.0)}:{coords.get('x1', 0.0)}:{coords.get('y1', 0.0)}\n")
-                    f.write(line)
+            header = ("# Updated PII Masking Configuration File\n"
+                      "# Format: PII_TEXT:TYPE:STRATEGY:PAGE:X0:Y0:X1:Y1\n"
+                      "#\n")
+            
+            # Handle both 'strategy' and 'suggested_strategy' fields
+            lines = [
+                f"{pii_item['text']}:{pii_item['type']}:"
+                f"{pii_item.get('strategy', pii_item.get('suggested_strategy', 'redact'))}:"
+                f"{pii_item.get('page', 0)}:{coords.get('x0', 0.0)}:"
+                f"{coords.get('y0', 0.0)}:{coords.get('x1', 0.0)}:{coords.get('y1', 0.0)}\n"
+                for pii_item in config_data
+                for coords in (pii_item.get('coordinates', {}),)
+            ]
+            
+            # Write updated config file atomically in one call
+            write_text_atomic(str(config_path), header + ''.join(lines))
             
             return {
                 'document_id': document_id,
@@ -489,17 +957,8 @@ class SimpleDocumentProcessor:
             Dictionary with masking results
         """
         try:
-            # Find input document - look for files that start with document_id_
-            input_files = list(UPLOADS_DIR.glob(f"{document_id}_*"))
-            
-            # Filter to only include supported file types
-            supported_extensions = ['.pdf', '.docx', '.txt']
-            input_files = [f for f in input_files if f.suffix.lower() in supported_extensions]
-            
-            if not input_files:
-                raise ValueError(f"Document file not found for document_id: {document_id}")
-            
-            input_document = input_files[0]
+            # Find input document
+            input_document = self._find_document_file(document_id)
             
             # Find config file
             config_filename = f"{document_id}_pii_config.txt"
@@ -508,9 +967,17 @@ class SimpleDocumentProcessor:
             if not config_path.exists():
                 raise ValueError("Config file not found. Generate config first.")
             
-            # For non-PDF documents, convert to PDF first
+            # Word and text documents whose config has no page coordinates are
+            # masked by text substitution directly, skipping PDF conversion
             file_extension = input_document.suffix.lower()
-            if file_extension != '.pdf':
+            converted_to_pdf = False
+            has_coordinates = file_extension == '.pdf' or any(
+                item['coordinates']['x1'] > 0 for item in self._parse_config_file(config_path)
+            )
+            if file_extension != '.pdf' and not PII_SUBPROCESS_MODE and not has_coordinates:
+                current_app.logger.info(f"Masking {file_extension} document directly without PDF conversion")
+                masking_input = input_document
+            elif file_extension != '.pdf':
                 # Convert to PDF format for masking
                 temp_pdf_path = UPLOADS_DIR / f"{document_id}_converted.pdf"
                 
@@ -525,6 +992,7 @@ class SimpleDocumentProcessor:
                 
                 # Use the converted PDF for masking
                 masking_input = temp_pdf_path
+                converted_to_pdf = True
             else:
                 masking_input = input_document
             
@@ -543,66 +1011,72 @@ class SimpleDocumentProcessor:
             current_app.logger.info(f"Absolute masking input: {absolute_masking_input}")
             current_app.logger.info(f"Input exists: {absolute_masking_input.exists()}")
             
-            result = subprocess.run([
-                'python', 'scripts/bert_pii_masker.py',
-                str(absolute_masking_input),
-                str(absolute_output_path),
-                str(absolute_config_path)
-            ], capture_output=True, text=True, cwd=current_app.root_path)
-            
-            if result.returncode != 0:
-                raise ValueError(f"PII masking failed: {result.stderr}")
-            
-            current_app.logger.info(f"PII masking completed: {result.stdout}")
+            if PII_SUBPROCESS_MODE:
+                result = subprocess.run([
+                    'python', 'scripts/bert_pii_masker.py',
+                    str(absolute_masking_input),
+                    str(absolute_output_path),
+                    str(absolute_config_path),
+                    f'--workers={MASKING_WORKERS}'
+                ], capture_output=True, text=True, cwd=current_app.root_path)
+                
+                if result.returncode != 0:
+                    raise ValueError(f"PII masking failed: {result.stderr}")
+                
+                current_app.logger.info(f"PII masking completed: {result.stdout}")
+            else:
+                from scripts.bert_pii_masker import run as run_masker
+                try:
+                    stats = run_masker(str(absolute_masking_input), str(absolute_output_path),
+                                       str(absolute_config_path),
+                                       ner_pipeline=get_pii_masker().ner_pipeline,
+                                       workers=MASKING_WORKERS)
+                except Exception as e:
+                    raise ValueError(f"PII masking failed: {str(e)}")
+                
+                current_app.logger.info(f"PII masking completed: {stats['total_pii_masked']} PII masked")
             
-            # Verify output file exists
-            if not output_path.exists():
+            # Verify output file exists, recording its size from the same stat call
+            try:
+                masked_file_size = output_path.stat().st_size
+            except FileNotFoundError:
                 raise ValueError("Masked PDF was not generated")
             
             # Clean up temporary converted PDF if it was created
-            if file_extension != '.pdf':
+            if converted_to_pdf:
                 try:
                     temp_pdf_path.unlink()  # Delete the temporary PDF
                     current_app.logger.info("Cleaned up temporary converted PDF")
                 except Exception as e:
                     current_app.logger.warning(f"Failed to clean up temporary PDF: {e}")
             
-            # Store masked PDF in MongoDB
-            try:
-                with open(output_path, 'rb') as f:
-                    masked_data = f.read()
-                
-                mongo_doc_id = mongo_db.store_file(
-                    file_data=masked_data,
-                    file_info={
-                        'original_name': output_filename,
-                        'file_size': len(masked_data),
-                        'status': 'masked',
-                        'file_type': '.pdf',
-                        'mime_type': 'application/pdf',
-                        'user_id': '41d52297-aaed-4985-b403-2ce3aa9cf124',
-                        'upload_date': get_current_timestamp(),
-                        'metadata': {
-                            'original_document_id': document_id,
-                            'document_id': document_id,  # Add this for consistent querying
-                            'local_path': str(output_path),
-                            'processing_type': 'pii_masking',
-                            'config_file': str(config_path)
-                        }
-                    }
-                )
-                current_app.logger.info(f"Masked file stored in MongoDB with ID: {mongo_doc_id}")
-            except Exception as e:
-                current_app.logger.error(f"MongoDB storage failed for masked file: {e}")
-                mongo_doc_id = None
+            # Store masked PDF in MongoDB in the background; the local copy
+            # already serves downloads and /status reports the upload state
+            mongo_upload = submit_mongo_upload(document_id, output_path, {
+                'original_name': output_filename,
+                'file_size': masked_file_size,
+                'status': 'masked',
+                'file_type': '.pdf',
+                'mime_type': 'application/pdf',
+                'user_id': '41d52297-aaed-4985-b403-2ce3aa9cf124',
+                'upload_date': get_current_timestamp(),
+                'metadata': {
+                    'original_document_id': document_id,
+                    'document_id': document_id,  # Add this for consistent querying
+                    'local_path': str(output_path),
+                    'processing_type': 'pii_masking',
+                    'config_file': str(config_path)
+                }
+            })
             
             return {
                 'document_id': document_id,
                 'masked_document_id': f"{document_id}_masked",
                 'output_path': str(output_path),
                 'output_filename': output_filename,
-                'mongo_id': mongo_doc_id,
-                'file_size': output_path.stat().st_size,
+                'mongo_id': None,
+                'mongo_upload': mongo_upload,
+                'file_size': masked_file_size,
                 'status': 'masking_completed'
             }
             
@@ -621,18 +1095,33 @@ class SimpleDocumentProcessor:
             Dictionary with document info from MongoDB
         """
         try:
+            cache_key = (document_id, status)
+            now = time.monotonic()
+            with _mongo_info_lock:
+                cached = _mongo_info_cache.get(cache_key)
+                if cached is not None and cached[0] > now:
+                    return dict(cached[1])
+            
             query = {'metadata.document_id': document_id}
             if status:
                 query['status'] = status
             
             files = mongo_db.get_files(query)
             
-            return {
+            info = {
                 'document_id': document_id,
                 'files': files,
                 'total_files': len(files)
             }
             
+            with _mongo_info_lock:
+                _mongo_info_cache[cache_key] = (now + MONGO_INFO_CACHE_TTL, info)
+                _mongo_info_cache.move_to_end(cache_key)
+                if len(_mongo_info_cache) > MONGO_INFO_CACHE_SIZE:
+                    _mongo_info_cache.popitem(last=False)
+            
+            return dict(info)
+            
         except Exception as e:
             raise ValueError(f"Failed to retrieve document info: {str(e)}")
 
@@ -654,6 +1143,7 @@ class SimpleDocumentProcessor:
         Returns:
             Dictionary with cleanup results
         """
+        log = current_app.logger
         try:
             cleanup_results = {
                 'document_id': document_id,
@@ -665,86 +1155,64 @@ class SimpleDocumentProcessor:
             
             # 1. Remove input documents from MongoDB (keep masked ones)
             try:
+                settle_mongo_uploads(document_id, 'uploaded')
                 deleted_count = mongo_db.delete_documents_by_document_id(document_id, status='uploaded')
+                invalidate_mongo_info(document_id)
                 cleanup_results['mongodb_input_deleted'] = deleted_count
-                current_app.logger.info(f"Deleted {deleted_count} input documents from MongoDB for document_id: {document_id}")
+                log.info("Deleted %d input documents from MongoDB for document_id: %s", deleted_count, document_id)
             except Exception as e:
                 error_msg = f"Failed to delete MongoDB input documents: {str(e)}"
                 cleanup_results['errors'].append(error_msg)
-                current_app.logger.error(error_msg)
+                log.error(error_msg)
             
-            # 2. Remove input files from local storage
+            # 2. Remove input files (and converted temporaries) from local storage
             try:
-                supported_extensions = ['*.pdf', '*.docx', '*.txt']
-                for ext in supported_extensions:
-                    input_files = list(UPLOADS_DIR.glob(f"{document_id}_{ext}"))
-                    for file_path in input_files:
-                        try:
-                            file_path.unlink()  # Delete the file
-                            cleanup_results['local_input_files_deleted'].append(str(file_path))
-                            current_app.logger.info(f"Deleted local input file: {file_path}")
-                        except Exception as e:
-                            error_msg = f"Failed to delete local file {file_path}: {str(e)}"
-                            cleanup_results['errors'].append(error_msg)
-                            current_app.logger.error(error_msg)
-                            
-                # Also remove any converted temporary files
-                temp_files = list(UPLOADS_DIR.glob(f"{document_id}_converted.pdf"))
-                for file_path in temp_files:
-                    try:
-                        file_path.unlink()
-                        cleanup_results['local_input_files_deleted'].append(str(file_path))
-                        current_app.logger.info(f"Deleted temporary converted file: {file_path}")
-                    except Exception as e:
-                        error_msg = f"Failed to delete temp file {file_path}: {str(e)}"
-                        cleanup_results['errors'].append(error_msg)
-                        current_app.logger.error(error_msg)
-                        
+                forget_documents([document_id])
+                self._remove_cleanup_files(
+                    find_document_files(UPLOADS_DIR, document_id, UPLOAD_FILE_SUFFIXES),
+                    cleanup_results['local_input_files_deleted'], cleanup_results['errors'], 'local input file'
+                )
             except Exception as e:
                 error_msg = f"Error during local file cleanup: {str(e)}"
                 cleanup_results['errors'].append(error_msg)
-                current_app.logger.error(error_msg)
+                log.error(error_msg)
             
             # 3. Remove config files from local storage
             try:
-                config_patterns = [
-                    f"{document_id}_pii_config.txt",
-                    f"{document_id}_pii_config_detection_report.txt"
-                ]
-                
-                for pattern in config_patterns:
-                    config_files = list(CONFIGS_DIR.glob(pattern))
-                    for file_path in config_files:
-                        try:
-                            file_path.unlink()
-                            cleanup_results['config_files_deleted'].append(str(file_path))
-                            current_app.logger.info(f"Deleted config file: {file_path}")
-                        except Exception as e:
-                            error_msg = f"Failed to delete config file {file_path}: {str(e)}"
-                            cleanup_results['errors'].append(error_msg)
-                            current_app.logger.error(error_msg)
-                            
+                self._remove_cleanup_files(
+                    config_file_paths(document_id),
+                    cleanup_results['config_files_deleted'], cleanup_results['errors'], 'config file'
+                )
             except Exception as e:
                 error_msg = f"Error during config file cleanup: {str(e)}"
                 cleanup_results['errors'].append(error_msg)
-                current_app.logger.error(error_msg)
+                log.error(error_msg)
             
             # Log summary
-            total_deleted = (cleanup_results['mongodb_input_deleted'] + 
-                           len(cleanup_results['local_input_files_deleted']) + 
-                           len(cleanup_results['config_files_deleted']))
-            
-            current_app.logger.info(f"Cleanup summary for {document_id}: "
-                                  f"MongoDB: {cleanup_results['mongodb_input_deleted']}, "
-                                  f"Local files: {len(cleanup_results['local_input_files_deleted'])}, "
-                                  f"Config files: {len(cleanup_results['config_files_deleted'])}, "
-                                  f"Errors: {len(cleanup_results['errors'])}")
+            log.info("Cleanup summary for %s: MongoDB: %d, Local files: %d, Config files: %d, Errors: %d",
+                     document_id,
+                     cleanup_results['mongodb_input_deleted'],
+                     len(cleanup_results['local_input_files_deleted']),
+                     len(cleanup_results['config_files_deleted']),
+                     len(cleanup_results['errors']))
             
             return cleanup_results
             
         except Exception as e:
             raise ValueError(f"Cleanup failed: {str(e)}")
 
+    def _remove_cleanup_files(self, paths: List[str], deleted: List[str], errors: List[str], label: str) -> None:
+        """Delete files for a cleanup, recording removed paths and failures."""
+        log = current_app.logger
+        removed, failed = remove_files(paths)
+        deleted.extend(removed)
+        for path in removed:
+            log.info("Deleted %s: %s", label, path)
+        for path, error in failed:
+            error_msg = f"Failed to delete {label} {path}: {error}"
+            errors.append(error_msg)
+            log.error(error_msg)
+
     def force_cleanup_all_processing_data(self, document_id: str) -> Dict[str, Any]:
         """
         Force cleanup of ALL data related to a document (including masked data).
@@ -756,6 +1224,7 @@ class SimpleDocumentProcessor:
         Returns:
             Dictionary with cleanup results
         """
+        log = current_app.logger
         try:
             cleanup_results = {
                 'document_id': document_id,
@@ -768,100 +1237,134 @@ class SimpleDocumentProcessor:
             
             # 1. Remove ALL documents from MongoDB (both uploaded and masked)
             try:
+                settle_mongo_uploads(document_id)
                 deleted_count = mongo_db.delete_documents_by_document_id(document_id)  # No status filter
+                invalidate_mongo_info(document_id)
                 cleanup_results['mongodb_all_deleted'] = deleted_count
-                current_app.logger.info(f"Deleted {deleted_count} documents from MongoDB for document_id: {document_id}")
+                log.info("Deleted %d documents from MongoDB for document_id: %s", deleted_count, document_id)
             except Exception as e:
                 error_msg = f"Failed to delete MongoDB documents: {str(e)}"
                 cleanup_results['errors'].append(error_msg)
-                current_app.logger.error(error_msg)
+                log.error(error_msg)
             
-            # 2. Remove all local files
+            # 2. Remove all local files (inputs and converted temporaries)
             try:
-                # Input files
-                supported_extensions = ['*.pdf', '*.docx', '*.txt']
-                for ext in supported_extensions:
-                    files = list(UPLOADS_DIR.glob(f"{document_id}_{ext}"))
-                    for file_path in files:
-                        try:
-                            file_path.unlink()
-                            cleanup_results['local_files_deleted'].append(str(file_path))
-                            current_app.logger.info(f"Deleted local file: {file_path}")
-                        except Exception as e:
-                            error_msg = f"Failed to delete file {file_path}: {str(e)}"
-                            cleanup_results['errors'].append(error_msg)
-                            current_app.logger.error(error_msg)
-                
-                # Temp files
-                temp_files = list(UPLOADS_DIR.glob(f"{document_id}_converted.pdf"))
-                for file_path in temp_files:
-                    try:
-                        file_path.unlink()
-                        cleanup_results['local_files_deleted'].append(str(file_path))
-                        current_app.logger.info(f"Deleted temp file: {file_path}")
-                    except Exception as e:
-                        error_msg = f"Failed to delete temp file {file_path}: {str(e)}"
-                        cleanup_results['errors'].append(error_msg)
-                        current_app.logger.error(error_msg)
-                        
+                forget_documents([document_id])
+                self._remove_cleanup_files(
+                    find_document_files(UPLOADS_DIR, document_id, UPLOAD_FILE_SUFFIXES),
+                    cleanup_results['local_files_deleted'], cleanup_results['errors'], 'local file'
+                )
             except Exception as e:
                 error_msg = f"Error during local file cleanup: {str(e)}"
                 cleanup_results['errors'].append(error_msg)
-                current_app.logger.error(error_msg)
+                log.error(error_msg)
             
             # 3. Remove config files
             try:
-                config_patterns = [
-                    f"{document_id}_pii_config.txt",
-                    f"{document_id}_pii_config_detection_report.txt"
-                ]
-                
-                for pattern in config_patterns:
-                    config_files = list(CONFIGS_DIR.glob(pattern))
-                    for file_path in config_files:
-                        try:
-                            file_path.unlink()
-                            cleanup_results['config_files_deleted'].append(str(file_path))
-                            current_app.logger.info(f"Deleted config file: {file_path}")
-                        except Exception as e:
-                            error_msg = f"Failed to delete config file {file_path}: {str(e)}"
-                            cleanup_results['errors'].append(error_msg)
-                            current_app.logger.error(error_msg)
-                            
+                self._remove_cleanup_files(
+                    config_file_paths(document_id),
+                    cleanup_results['config_files_deleted'], cleanup_results['errors'], 'config file'
+                )
             except Exception as e:
                 error_msg = f"Error during config file cleanup: {str(e)}"
                 cleanup_results['errors'].append(error_msg)
-                current_app.logger.error(error_msg)
+                log.error(error_msg)
             
             # 4. Remove result files
             try:
-                result_patterns = [
-                    f"{document_id}_masked.pdf",
-                    f"{document_id}_masked_masking_report.txt"
-                ]
-                
-                for pattern in result_patterns:
-                    result_files = list(RESULTS_DIR.glob(pattern))
-                    for file_path in result_files:
-                        try:
-                            file_path.unlink()
-                            cleanup_results['results_deleted'].append(str(file_path))
-                            current_app.logger.info(f"Deleted result file: {file_path}")
-                        except Exception as e:
-                            error_msg = f"Failed to delete result file {file_path}: {str(e)}"
-                            cleanup_results['errors'].append(error_msg)
-                            current_app.logger.error(error_msg)
-                            
+                self._remove_cleanup_files(
+                    [str(RESULTS_DIR / f"{document_id}_masked.pdf"),
+                     str(RESULTS_DIR / f"{document_id}_masked_masking_report.txt")],
+                    cleanup_results['results_deleted'], cleanup_results['errors'], 'result file'
+                )
             except Exception as e:
                 error_msg = f"Error during result file cleanup: {str(e)}"
                 cleanup_results['errors'].append(error_msg)
-                current_app.logger.error(error_msg)
+                log.error(error_msg)
             
             return cleanup_results
             
         except Exception as e:
             raise ValueError(f"Force cleanup failed: {str(e)}")
 
+    def _lookup_cached_configs(self, document_ids: List[str]) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """
+        Get content hashes of documents and fetch cached configs for identical contents.
+        
+        Hashes taken at upload are reused; only documents uploaded through
+        another process are hashed from disk.
+        
+        Returns:
+            Tuple of (document_id -> content hash, content hash -> cached config text)
+        """
+        content_hashes = {}
+        missing_ids = []
+        for document_id in document_ids:
+            content_hash = _index_get(_document_hashes, document_id)
+            if content_hash is None:
+                missing_ids.append(document_id)
+            else:
+                content_hashes[document_id] = content_hash
+        
+        def hash_document(document_id: str) -> str:
+            return calculate_file_hash(str(self._find_document_file(document_id)))
+        
+        # Hash the rest concurrently; hashlib releases the GIL while hashing
+        futures = {document_id: IO_POOL.submit(hash_document, document_id) for document_id in missing_ids}
+        for document_id, future in futures.items():
+            try:
+                content_hashes[document_id] = future.result()
+                _index_put(_document_hashes, document_id, content_hashes[document_id])
+            except Exception as e:
+                current_app.logger.warning(f"Could not hash document {document_id}: {e}")
+        
+        try:
+            cached_configs = mongo_db.get_cached_pii_configs(list(set(content_hashes.values())), PII_DETECTOR_VERSION)
+        except Exception as e:
+            current_app.logger.warning(f"PII config cache unavailable: {e}")
+            cached_configs = {}
+        
+        return content_hashes, cached_configs
+    
+    @staticmethod
+    def _is_cacheable_config(result: Dict[str, Any]) -> bool:
+        """
+        Whether a generated config may be cached for identical uploads.
+        
+        Configs of scanned PDFs are not cached: a cache hit would skip the
+        OCR step, which writes the extracted text that masking then uses and
+        records it in MongoDB.
+        """
+        return not result.get('cache_hit') and not result.get('ocr_processed')
+    
+    def _store_new_configs(self, new_configs: Dict[str, str]) -> None:
+        """Cache newly generated configs keyed by content hash."""
+        try:
+            mongo_db.store_cached_pii_configs(new_configs, PII_DETECTOR_VERSION)
+        except Exception as e:
+            current_app.logger.warning(f"Failed to cache PII configs: {e}")
+    
+    def generate_pii_config_with_cache(self, document_id: str) -> Dict[str, Any]:
+        """
+        Generate PII configuration for one document, reusing a cached config for identical contents.
+        
+        Args:
+            document_id: Document ID
+            
+        Returns:
+            Dictionary with config generation results
+        """
+        content_hashes, cached_configs = self._lookup_cached_configs([document_id])
+        content_hash = content_hashes.get(document_id)
+        
+        result = self.generate_pii_config(document_id, cached_configs.get(content_hash))
+        
+        if content_hash and self._is_cacheable_config(result):
+            with open(result['config_path'], 'r') as f:
+                self._store_new_configs({content_hash: f.read()})
+        
+        return result
+    
     def generate_pii_config_bulk(self, document_ids: List[str]) -> Dict[str, Any]:
         """
         Generate PII configuration for multiple documents using parallel processing.
@@ -875,47 +1378,58 @@ class SimpleDocumentProcessor:
         try:
             successful_configs = []
             failed_configs = []
+            new_configs = {}
             
             # Capture current Flask app context for worker threads
             app = current_app._get_current_object()
             
+            # Look up configs already generated for identical document contents
+            content_hashes, cached_configs = self._lookup_cached_configs(document_ids)
+            
             def generate_config_with_context(document_id: str):
                 """Wrapper function that preserves Flask app context."""
                 with app.app_context():
-                    return self.generate_pii_config(document_id)
+                    cached_config = cached_configs.get(content_hashes.get(document_id))
+                    return self.generate_pii_config(document_id, cached_config)
             
-            # Use ThreadPoolExecutor for parallel PII detection
-            max_workers = min(len(document_ids), 5)  # Limit concurrent workers to prevent overload
-            current_app.logger.info(f"Starting parallel PII detection for {len(document_ids)} documents using {max_workers} workers")
+            # Use the shared detection pool for parallel PII detection
+            current_app.logger.info(f"Starting parallel PII detection for {len(document_ids)} documents")
             
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                # Submit all detection tasks with app context preservation
-                future_to_document_id = {
-                    executor.submit(generate_config_with_context, document_id): document_id 
-                    for document_id in document_ids
-                }
-                
-                # Process completed tasks as they finish
-                for future in as_completed(future_to_document_id):
-                    document_id = future_to_document_id[future]
-                    try:
-                        result = future.result()
-                        successful_configs.append({
-                            'document_id': document_id,
-                            'config_data': result['config_data'],
-                            'total_pii': result['total_pii'],
-                            'status': 'config_generated'
-                        })
-                        current_app.logger.info(f"Generated config for document: {document_id}")
-                    except Exception as e:
-                        failed_configs.append({
-                            'document_id': document_id,
-                            'error': str(e)
-                        })
-                        current_app.logger.error(f"Failed to generate config for {document_id}: {str(e)}")
+            # Submit all detection tasks with app context preservation
+            future_to_document_id = {
+                DETECTION_POOL.submit(generate_config_with_context, document_id): document_id 
+                for document_id in document_ids
+            }
+            
+            # Process completed tasks as they finish
+            for future in as_completed(future_to_document_id):
+                document_id = future_to_document_id[future]
+                try:
+                    result = future.result()
+                    successful_configs.append({
+                        'document_id': document_id,
+                        'config_data': result['config_data'],
+                        'total_pii': result['total_pii'],
+                        'status': 'config_generated'
+                    })
+                    
+                    content_hash = content_hashes.get(document_id)
+                    if content_hash and self._is_cacheable_config(result):
+                        with open(result['config_path'], 'r') as f:
+                            new_configs[content_hash] = f.read()
+                    current_app.logger.info(f"Generated config for document: {document_id}")
+                except Exception as e:
+                    failed_configs.append({
+                        'document_id': document_id,
+                        'error': str(e)
+                    })
+                    current_app.logger.error(f"Failed to generate config for {document_id}: {str(e)}")
             
             current_app.logger.info(f"Parallel PII detection completed: {len(successful_configs)} successful, {len(failed_configs)} failed")
             
+            # Cache newly generated configs for future identical uploads
+            self._store_new_configs(new_configs)
+            
             return {
                 'successful_configs': successful_configs,
                 'failed_configs': failed_configs,
@@ -950,36 +1464,34 @@ class SimpleDocumentProcessor:
                 with app.app_context():
                     return self.apply_masking(document_id)
             
-            # Use ThreadPoolExecutor for parallel PII masking
-            max_workers = min(len(document_ids), 4)  # Limit concurrent workers for masking (more resource intensive)
-            current_app.logger.info(f"Starting parallel PII masking for {len(document_ids)} documents using {max_workers} workers")
+            # Use the shared masking pool for parallel PII masking
+            current_app.logger.info(f"Starting parallel PII masking for {len(document_ids)} documents")
             
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                # Submit all masking tasks with app context preservation
-                future_to_document_id = {
-                    executor.submit(apply_masking_with_context, document_id): document_id 
-                    for document_id in document_ids
-                }
-                
-                # Process completed tasks as they finish
-                for future in as_completed(future_to_document_id):
-                    document_id = future_to_document_id[future]
-                    try:
-                        result = future.result()
-                        successful_maskings.append({
-                            'document_id': document_id,
-                            'masked_document_id': result['masked_document_id'],
-                            'output_filename': result['output_filename'],
-                            'file_size': result['file_size'],
-                            'status': 'masking_completed'
-                        })
-                        current_app.logger.info(f"Applied masking for document: {document_id}")
-                    except Exception as e:
-                        failed_maskings.append({
-                            'document_id': document_id,
-                            'error': str(e)
-                        })
-                        current_app.logger.error(f"Failed to apply masking for {document_id}: {str(e)}")
+            # Submit all masking tasks with app context preservation
+            future_to_document_id = {
+                MASKING_POOL.submit(apply_masking_with_context, document_id): document_id 
+                for document_id in document_ids
+            }
+            
+            # Process completed tasks as they finish
+            for future in as_completed(future_to_document_id):
+                document_id = future_to_document_id[future]
+                try:
+                    result = future.result()
+                    successful_maskings.append({
+                        'document_id': document_id,
+                        'masked_document_id': result['masked_document_id'],
+                        'output_filename': result['output_filename'],
+                        'file_size': result['file_size'],
+                        'status': 'masking_completed'
+                    })
+                    current_app.logger.info(f"Applied masking for document: {document_id}")
+                except Exception as e:
+                    failed_maskings.append({
+                        'document_id': document_id,
+                        'error': str(e)
+                    })
+                    current_app.logger.error(f"Failed to apply masking for {document_id}: {str(e)}")
             
             current_app.logger.info(f"Parallel PII masking completed: {len(successful_maskings)} successful, {len(failed_maskings)} failed")
             
@@ -995,6 +1507,119 @@ class SimpleDocumentProcessor:
         except Exception as e:
             raise ValueError(f"Bulk masking failed: {str(e)}")
 
+    def generate_and_mask_bulk(self, document_ids: List[str]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Generate PII configs and apply masking as a per-document pipeline.
+        
+        Masking for a document is submitted as soon as its config is ready,
+        so masking of early documents overlaps detection of later ones.
+        
+        Args:
+            document_ids: List of document IDs
+            
+        Returns:
+            Tuple of (config results, masking results) in the same shape as
+            generate_pii_config_bulk and apply_masking_bulk
+        """
+        try:
+            successful_configs = []
+            failed_configs = []
+            successful_maskings = []
+            failed_maskings = []
+            new_configs = {}
+            
+            # Capture current Flask app context for worker threads
+            app = current_app._get_current_object()
+            
+            content_hashes, cached_configs = self._lookup_cached_configs(document_ids)
+            
+            def generate_config_with_context(document_id: str):
+                """Wrapper function that preserves Flask app context."""
+                with app.app_context():
+                    cached_config = cached_configs.get(content_hashes.get(document_id))
+                    return self.generate_pii_config(document_id, cached_config)
+            
+            def apply_masking_with_context(document_id: str):
+                """Wrapper function that preserves Flask app context."""
+                with app.app_context():
+                    return self.apply_masking(document_id)
+            
+            current_app.logger.info(f"Starting pipelined PII processing for {len(document_ids)} documents")
+            
+            config_futures = {
+                DETECTION_POOL.submit(generate_config_with_context, document_id): document_id
+                for document_id in document_ids
+            }
+            masking_futures = {}
+            
+            # Hand each document to the masking pool as soon as its config is ready
+            for future in as_completed(config_futures):
+                document_id = config_futures[future]
+                try:
+                    result = future.result()
+                    successful_configs.append({
+                        'document_id': document_id,
+                        'config_data': result['config_data'],
+                        'total_pii': result['total_pii'],
+                        'status': 'config_generated'
+                    })
+                    
+                    content_hash = content_hashes.get(document_id)
+                    if content_hash and self._is_cacheable_config(result):
+                        with open(result['config_path'], 'r') as f:
+                            new_configs[content_hash] = f.read()
+                    
+                    masking_futures[MASKING_POOL.submit(apply_masking_with_context, document_id)] = document_id
+                except Exception as e:
+                    failed_configs.append({
+                        'document_id': document_id,
+                        'error': str(e)
+                    })
+                    current_app.logger.error(f"Failed to generate config for {document_id}: {str(e)}")
+            
+            for future in as_completed(masking_futures):
+                document_id = masking_futures[future]
+                try:
+                    result = future.result()
+                    successful_maskings.append({
+                        'document_id': document_id,
+                        'masked_document_id': result['masked_document_id'],
+                        'output_filename': result['output_filename'],
+                        'file_size': result['file_size'],
+                        'status': 'masking_completed'
+                    })
+                except Exception as e:
+                    failed_maskings.append({
+                        'document_id': document_id,
+                        'error': str(e)
+                    })
+                    current_app.logger.error(f"Failed to apply masking for {document_id}: {str(e)}")
+            
+            self._store_new_configs(new_configs)
+            
+            current_app.logger.info(f"Pipelined PII processing completed: {len(successful_configs)} configs, {len(successful_maskings)} masked")
+            
+            config_result = {
+                'successful_configs': successful_configs,
+                'failed_configs': failed_configs,
+                'total_documents': len(document_ids),
+                'successful_count': len(successful_configs),
+                'failed_count': len(failed_configs),
+                'status': 'completed' if len(failed_configs) == 0 else 'partial_success'
+            }
+            masking_result = {
+                'successful_maskings': successful_maskings,
+                'failed_maskings': failed_maskings,
+                'total_documents': len(successful_configs),
+                'successful_count': len(successful_maskings),
+                'failed_count': len(failed_maskings),
+                'status': 'completed' if len(failed_maskings) == 0 else 'partial_success'
+            }
+            return config_result, masking_result
+            
+        except Exception as e:
+            raise ValueError(f"Pipelined processing failed: {str(e)}")
+
 
 # Initialize processor
 processor = SimpleDocumentProcessor()
@@ -1025,6 +1650,8 @@ def upload_documents():
         
     except ValueError as e:
         return error_response(str(e), 'UPLOAD_ERROR')
+    except RequestEntityTooLarge:
+        raise  # Answered with 413 by the app's HTTP error handler
     except Exception as e:
         current_app.logger.error(f"Upload error: {str(e)}")
         return error_response('Upload failed', 'INTERNAL_ERROR')
@@ -1046,6 +1673,9 @@ def generate_config():
         if len(document_ids) == 0:
             return error_response('Valid document IDs required', 'INVALID_DATA')
         
+        if wants_async():
+            return _task_accepted(submit_task(processor.generate_pii_config_bulk, document_ids))
+        
         # Always use bulk processing (works for single documents too)
         result = processor.generate_pii_config_bulk(document_ids)
         return success_response(result)
@@ -1105,6 +1735,9 @@ def apply_masking():
         if len(document_ids) == 0:
             return error_response('Valid document IDs required', 'INVALID_DATA')
         
+        if wants_async():
+            return _task_accepted(submit_task(processor.apply_masking_bulk, document_ids))
+        
         # Always use bulk processing (works for single documents too)
         result = processor.apply_masking_bulk(document_ids)
         return success_response(result)
@@ -1116,6 +1749,15 @@ def apply_masking():
         return error_response('Masking failed', 'INTERNAL_ERROR')
 
 
+@simple_processing_bp.route('/task/<task_id>', methods=['GET'])
+def get_task(task_id: str):
+    """Get the status of a config generation or masking task submitted with ?async=true."""
+    status = get_task_status(task_id)
+    if status is None:
+        return error_response('TASK_NOT_FOUND', 'Task not found', 404)
+    return success_response(status)
+
+
 @simple_processing_bp.route('/generate-config/bulk', methods=['POST'])
 def generate_config_bulk():
     """Generate PII configuration for multiple documents (legacy endpoint - redirects to unified endpoint)."""
@@ -1140,16 +1782,17 @@ def download_masked_document(document_id: str):
             output_filename = f"{document_id}_masked.pdf"
             output_path = RESULTS_DIR / output_filename
         
-        if not output_path.exists():
-            return error_response('Masked document not found', 'FILE_NOT_FOUND')
-        
+        # Path-based send_file streams through wsgi.file_wrapper (sendfile
+        # under gunicorn) and raises here instead of a separate exists() stat
         return send_file(
-            str(output_path),
+            output_path,
             as_attachment=True,
             download_name=output_filename,
             mimetype='application/pdf'
         )
         
+    except FileNotFoundError:
+        return error_response('Masked document not found', 'FILE_NOT_FOUND')
     except Exception as e:
         current_app.logger.error(f"Download error: {str(e)}")
         return error_response('Download failed', 'INTERNAL_ERROR')
@@ -1164,17 +1807,18 @@ def get_document_status(document_id: str):
             'uploaded': False,
             'config_generated': False,
             'masking_completed': False,
-            'mongo_files': {}
+            'mongo_files': {},
+            'original_mongo_upload': get_mongo_upload_status(document_id, 'uploaded'),
+            'masked_mongo_upload': get_mongo_upload_status(document_id, 'masked'),
+            'processing_job': get_processing_job_status(document_id)
         }
         
         # Check if uploaded
-        supported_extensions = ['*.pdf', '*.docx', '*.txt']
-        uploaded_files = []
-        for ext in supported_extensions:
-            uploaded_files.extend(list(UPLOADS_DIR.glob(f"{document_id}_{ext}")))
-        
-        if uploaded_files:
+        try:
+            processor._find_document_file(document_id)
             status['uploaded'] = True
+        except ValueError:
+            pass
         
         # Check if config exists
         config_path = CONFIGS_DIR / f"{document_id}_pii_config.txt"
@@ -1219,30 +1863,23 @@ def preview_original_document(document_id: str):
     """Serve the original document for preview."""
     try:
         # Find the uploaded file - support multiple extensions
-        supported_extensions = ['*.pdf', '*.docx', '*.txt']
-        uploaded_files = []
-        for ext in supported_extensions:
-            uploaded_files.extend(list(UPLOADS_DIR.glob(f"{document_id}_{ext}")))
-        
-        if not uploaded_files:
+        try:
+            document_path = processor._find_document_file(document_id)
+        except ValueError:
             return error_response('Document not found', 'NOT_FOUND'), 404
         
-        document_path = uploaded_files[0]
-        
         # Determine MIME type based on extension
         file_extension = document_path.suffix.lower()
-        mime_type_map = {
-            '.pdf': 'application/pdf',
-            '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-            '.txt': 'text/plain'
-        }
-        mime_type = mime_type_map.get(file_extension, 'application/octet-stream')
+        mime_type = MIME_TYPES.get(file_extension, 'application/octet-stream')
         
+        # Conditional by default (ETag, Last-Modified and Range); masked
+        # previews are revalidated instead since re-masking rewrites them
         response = send_file(
             document_path, 
             mimetype=mime_type,
             as_attachment=False,
-            download_name=document_path.name
+            download_name=document_path.name,
+            max_age=ORIGINAL_PREVIEW_MAX_AGE
         )
         
         # Allow iframe embedding for document preview (mainly for PDFs)
@@ -1259,8 +1896,6 @@ def preview_masked_document(document_id: str):
     """Serve the masked PDF for preview."""
     try:
         masked_path = RESULTS_DIR / f"{document_id}_masked.pdf"
-        if not masked_path.exists():
-            return error_response('Masked document not found', 'NOT_FOUND'), 404
         
         response = send_file(
             masked_path, 
@@ -1272,6 +1907,8 @@ def preview_masked_document(document_id: str):
         response.headers['X-Allow-Iframe'] = 'true'
         return response
         
+    except FileNotFoundError:
+        return error_response('Masked document not found', 'NOT_FOUND'), 404
     except Exception as e:
         current_app.logger.error(f"Masked preview error: {str(e)}")
         return error_response('Masked preview failed', 'INTERNAL_ERROR'), 500
@@ -1281,11 +1918,15 @@ def preview_masked_document(document_id: str):
 def debug_mongo_contents():
     """Debug endpoint to see all documents in MongoDB."""
     try:
-        # Get all files from MongoDB
-        all_files = mongo_db.get_files({})  # Empty query to get all files
+        # Page through files so large collections are not loaded at once
+        skip = max(request.args.get('skip', 0, type=int), 0)
+        limit = max(request.args.get('limit', DEBUG_LIST_LIMIT, type=int), 0)
+        all_files = mongo_db.get_files({}, skip=skip, limit=limit)
         
         return success_response({
             'total_files': len(all_files),
+            'skip': skip,
+            'limit': limit,
             'files': all_files
         })
         
@@ -1314,49 +1955,43 @@ def download_from_mongo(document_id: str):
     """Download a file from MongoDB by document_id and status."""
     try:
         status = request.args.get('status', 'masked')  # Default to masked files
+        log = current_app.logger
         
-        current_app.logger.info(f"Attempting to download from MongoDB: document_id={document_id}, status={status}")
+        log.debug("Attempting to download from MongoDB: document_id=%s, status=%s", document_id, status)
         
-        # Since the existing MongoDB documents might not have document_id in metadata,
-        # let's try to find files by status first and then filter by any available identifier
-        files = mongo_db.get_files({'status': status})
-        current_app.logger.info(f"Found {len(files)} files with status '{status}'")
+        # Indexed lookup of the single matching file
+        files = mongo_db.get_files({'metadata.document_id': document_id, 'status': status}, limit=1)
         
-        # If no files with status, try to get all files and filter
         if not files:
-            all_files = mongo_db.get_files({})
-            current_app.logger.info(f"Found {len(all_files)} total files in MongoDB")
-            
-            # Log the structure of files for debugging
-            if all_files:
-                sample_file = all_files[0]
-                current_app.logger.info(f"Sample file structure: {list(sample_file.keys())}")
-                if 'metadata' in sample_file:
-                    current_app.logger.info(f"Sample metadata keys: {list(sample_file['metadata'].keys())}")
-            
             return error_response(f'No {status} files found in MongoDB', 'FILE_NOT_FOUND')
         
-        # For now, just return the first file with the matching status
-        # In a real implementation, you'd want to match the document_id properly
         file_info = files[0]
-        current_app.logger.info(f"Selected file: {file_info.get('original_name', 'unknown')}")
+        log.debug("Selected file: %s", file_info.get('original_name', 'unknown'))
         
-        # Retrieve file data from MongoDB
-        file_data = mongo_db.get_file_data(file_info['_id'])
+        # GridFS files are immutable, so the file ID and upload date identify
+        # the content; answer repeat requests without opening the file
+        etag = f"{file_info['file_id']}-{file_info['upload_date']}"
+        if etag in request.if_none_match:
+            response = current_app.response_class(status=304)
+            response.set_etag(etag)
+            return response
         
-        if not file_data:
-            return error_response('Failed to retrieve file data from MongoDB', 'RETRIEVAL_ERROR')
+        # Stream the file out of GridFS chunk by chunk
+        file_stream = mongo_db.open_file_stream(file_info['file_id'])
         
-        # Create a temporary file response
-        from io import BytesIO
-        file_stream = BytesIO(file_data)
+        if file_stream is None:
+            return error_response('Failed to retrieve file data from MongoDB', 'RETRIEVAL_ERROR')
         
-        return send_file(
+        response = send_file(
             file_stream,
             as_attachment=True,
             download_name=file_info.get('original_name', f'{document_id}_{status}.pdf'),
-            mimetype=file_info.get('mime_type', 'application/pdf')
+            mimetype=file_info.get('mime_type', 'application/pdf'),
+            etag=etag,
+            conditional=False
         )
+        response.content_length = file_stream.length
+        return response
         
     except Exception as e:
         current_app.logger.error(f"MongoDB download error: {str(e)}")
@@ -1367,8 +2002,10 @@ def download_from_mongo(document_id: str):
 def debug_mongo_all():
     """Debug endpoint to see all documents in MongoDB."""
     try:
-        # Get all files from MongoDB
-        all_files = mongo_db.get_files({})
+        # Page through files so large collections are not loaded at once
+        skip = max(request.args.get('skip', 0, type=int), 0)
+        limit = max(request.args.get('limit', DEBUG_LIST_LIMIT, type=int), 0)
+        all_files = mongo_db.get_files({}, skip=skip, limit=limit)
         
         # Format the response for better readability
         formatted_files = []
@@ -1385,6 +2022,8 @@ def debug_mongo_all():
         
         return success_response({
             'total_files': len(formatted_files),
+            'skip': skip,
+            'limit': limit,
             'files': formatted_files
         })
         
@@ -1443,6 +2082,270 @@ def force_cleanup_document_data(document_id: str):
 # SIMPLIFIED API ENDPOINTS FOR EXTERNAL USE
 # ============================================================================
 
+def cleanup_intermediate_files(processed_ids) -> None:
+    """Remove uploads and configs of processed documents, keeping the results."""
+    try:
+        current_app.logger.info("Auto-cleanup: Removing intermediate files for processed documents")
+
+        wanted_ids = frozenset(sys.intern(str(document_id)) for document_id in processed_ids)
+
+        # Each directory is walked once for the whole batch
+        paths_to_remove = []
+        for directory in (UPLOADS_DIR, CONFIGS_DIR):
+            with os.scandir(directory) as entries:
+                paths_to_remove.extend(
+                    entry.path for entry in entries
+                    if entry.name.split('_', 1)[0] in wanted_ids
+                )
+
+        removed, failed = remove_files(paths_to_remove)
+        forget_documents(wanted_ids)
+        current_app.logger.debug(f"Removed {len(removed)} intermediate files")
+        for path, error in failed:
+            current_app.logger.warning(f"Failed to remove {path}: {error}")
+
+    except Exception as cleanup_error:
+        current_app.logger.warning(f"Auto-cleanup warning: {cleanup_error}")
+
+
+def submit_intermediate_cleanup(processed_ids) -> None:
+    """Queue cleanup_intermediate_files on IO_POOL so the response does not wait for the deletes."""
+    if not processed_ids:
+        return
+    
+    app = current_app._get_current_object()
+    processed_ids = frozenset(processed_ids)
+    
+    def cleanup_with_context():
+        with app.app_context():
+            cleanup_intermediate_files(processed_ids)
+    
+    IO_POOL.submit(cleanup_with_context)
+
+
+def _run_processing_job(app, document_id: str) -> Dict[str, Any]:
+    """Generate the PII config and apply masking for a queued document."""
+    with app.app_context():
+        try:
+            config_info = processor.generate_pii_config_with_cache(document_id)
+        except Exception as e:
+            current_app.logger.error(f"Failed to generate config for {document_id}: {str(e)}")
+            try:
+                processor.cleanup_processing_data(document_id)
+            except:
+                pass  # Ignore cleanup errors during error handling
+            raise
+        
+        try:
+            masking = processor.apply_masking(document_id)
+        except Exception as e:
+            current_app.logger.error(f"Failed to apply masking for {document_id}: {str(e)}")
+            raise
+        
+        submit_intermediate_cleanup({document_id})
+        return {
+            'pii_count': config_info['total_pii'],
+            'masked_filename': masking['output_filename'],
+            'masked_file_size': masking['file_size']
+        }
+
+
+def submit_processing_job(document_id: str) -> None:
+    """Queue detection and masking of an uploaded document in the background."""
+    future = PROCESSING_JOB_POOL.submit(
+        _run_processing_job, current_app._get_current_object(), document_id
+    )
+    with _processing_jobs_lock:
+        if len(_processing_jobs) >= MAX_TRACKED_PROCESSING_JOBS:
+            for done_id in [d for d, f in _processing_jobs.items() if f.done()]:
+                del _processing_jobs[done_id]
+        _processing_jobs[document_id] = future
+
+
+def get_processing_job_status(document_id: str) -> Optional[Dict[str, Any]]:
+    """Get the state of a queued processing job, if the document has one."""
+    with _processing_jobs_lock:
+        future = _processing_jobs.get(document_id)
+    
+    if future is None:
+        return None
+    if future.running():
+        return {'status': 'processing'}
+    if not future.done():
+        return {'status': 'queued'}
+    
+    error = future.exception()
+    if error is not None:
+        return {'status': 'failed', 'error': str(error)}
+    return {'status': 'completed', **future.result()}
+
+
+def wants_async() -> bool:
+    """Whether the request asked for background processing with ?async=true."""
+    return request.args.get('async', 'false').lower() in ('1', 'true', 'yes')
+
+
+def submit_task(task_fn, *args) -> str:
+    """Run a processor method on PROCESSING_JOB_POOL and return its task ID."""
+    app = current_app._get_current_object()
+    
+    def run_with_context():
+        with app.app_context():
+            return task_fn(*args)
+    
+    task_id = str(uuid.uuid4())
+    future = PROCESSING_JOB_POOL.submit(run_with_context)
+    with _tasks_lock:
+        if len(_tasks) >= MAX_TRACKED_PROCESSING_JOBS:
+            for done_id in [t for t, f in _tasks.items() if f.done()]:
+                del _tasks[done_id]
+        _tasks[task_id] = future
+    return task_id
+
+
+def get_task_status(task_id: str) -> Optional[Dict[str, Any]]:
+    """Get the state and, once finished, the result of a submitted task."""
+    with _tasks_lock:
+        future = _tasks.get(task_id)
+    
+    if future is None:
+        return None
+    if future.running():
+        return {'task_id': task_id, 'status': 'processing'}
+    if not future.done():
+        return {'task_id': task_id, 'status': 'queued'}
+    
+    error = future.exception()
+    if error is not None:
+        return {'task_id': task_id, 'status': 'failed', 'error': str(error)}
+    return {'task_id': task_id, 'status': 'completed', 'result': future.result()}
+
+
+def _task_accepted(task_id: str):
+    """202 response pointing the client at the task status endpoint."""
+    return success_response({
+        'task_id': task_id,
+        'status': 'queued',
+        'status_url': f"/api/v1/simple/task/{task_id}"
+    }, message='Task queued for processing', status_code=202)
+
+
+def _queue_single_document():
+    """Upload a single document and queue its processing, responding with 202."""
+    file = request.files.get('document') or request.files.get('documents')
+    if not file:
+        return error_response('No document files provided', 'MISSING_FILES')
+    
+    try:
+        upload_info = processor.upload_document(file)
+    except Exception as e:
+        current_app.logger.error(f"Upload failed for {file.filename}: {str(e)}")
+        return error_response('Document upload failed', 'UPLOAD_FAILED')
+    
+    document_id = upload_info['document_id']
+    submit_processing_job(document_id)
+    current_app.logger.info(f"Document queued for processing: {document_id}")
+    
+    return success_response({
+        'document_id': document_id,
+        'original_filename': upload_info['filename'],
+        'file_size': upload_info['size'],
+        'status': 'queued',
+        'status_url': f"/api/v1/simple/status/{document_id}",
+        'download_url': f"/api/v1/simple/download/{document_id}"
+    }, message='Document queued for processing', status_code=202)
+
+
+def _process_single_document(file: FileStorage):
+    """
+    Fast path of process_documents for a single file.
+    
+    Runs upload, PII detection and masking inline without the batch
+    thread pools and builds the same response shape as the batch path.
+    """
+    try:
+        upload_info = processor.upload_document(file)
+    except Exception as e:
+        current_app.logger.error(f"Upload failed for {file.filename}: {str(e)}")
+        return error_response('All document uploads failed', 'ALL_UPLOADS_FAILED')
+    
+    document_id = upload_info['document_id']
+    current_app.logger.info(f"Document uploaded successfully: {document_id}")
+    
+    try:
+        config_info = processor.generate_pii_config_with_cache(document_id)
+    except Exception as e:
+        current_app.logger.error(f"Failed to generate config for {document_id}: {str(e)}")
+        try:
+            processor.cleanup_processing_data(document_id)
+        except:
+            pass  # Ignore cleanup errors during error handling
+        raise ValueError("All PII detection configurations failed")
+    
+    masking_failures = []
+    try:
+        masking = processor.apply_masking(document_id)
+    except Exception as e:
+        masking = None
+        masking_failures.append({'document_id': document_id, 'error': str(e)})
+        current_app.logger.error(f"Failed to apply masking for {document_id}: {str(e)}")
+    
+    processing_summary = {
+        'total_files_submitted': 1,
+        'upload_summary': {
+            'successful_uploads': 1,
+            'failed_uploads': 0,
+            'upload_failures': []
+        },
+        'detection_summary': {
+            'successful_detections': 1,
+            'failed_detections': 0,
+            'detection_failures': []
+        },
+        'masking_summary': {
+            'successful_maskings': 0 if masking is None else 1,
+            'failed_maskings': len(masking_failures),
+            'masking_failures': masking_failures
+        },
+        'processed_documents': [],
+        'download_links': {}
+    }
+    
+    if masking is None:
+        processing_summary['overall_status'] = 'failed'
+        processing_summary['message'] = message = 'No documents were successfully processed'
+        return success_response(processing_summary, message=message)
+    
+    processing_summary['processed_documents'].append({
+        'document_id': document_id,
+        'original_filename': upload_info['filename'],
+        'file_size': upload_info['size'],
+        'pii_count': config_info['total_pii'],
+        'masked_filename': masking['output_filename'],
+        'masked_file_size': masking['file_size'],
+        'status': 'completed'
+    })
+    processing_summary['download_links'][document_id] = {
+        'masked_document': f"/api/v1/simple/download/{document_id}",
+        'preview_original': f"/api/v1/simple/preview/{document_id}",
+        'preview_masked': f"/api/v1/simple/preview-masked/{document_id}"
+    }
+    
+    submit_intermediate_cleanup({document_id})
+    
+    processing_summary['overall_status'] = 'completed'
+    processing_summary['message'] = message = 'All 1 document(s) processed successfully'
+    processing_summary['single_document_response'] = {
+        'document_id': document_id,
+        'pii_count': config_info['total_pii'],
+        'original_filename': upload_info['filename'],
+        'masked_filename': masking['output_filename']
+    }
+    
+    current_app.logger.info("Document processing completed: completed")
+    return success_response(processing_summary, message=message)
+
+
 @simple_processing_bp.route('/process-documents', methods=['POST'])
 def process_documents():
     """
@@ -1490,6 +2393,9 @@ def process_documents():
         
         current_app.logger.info(f"Starting document processing for {len(files)} file(s)")
         
+        if len(files) == 1:
+            return _process_single_document(files[0])
+        
         # Step 1: Upload all documents
         current_app.logger.info("Step 1: Uploading documents...")
         upload_result = processor.upload_multiple_documents(files)
@@ -1502,21 +2408,15 @@ def process_documents():
         current_app.logger.info(f"Documents uploaded successfully: {len(document_ids)} file(s)")
         
         try:
-            # Step 2: Generate PII detection configs with parallel processing
-            current_app.logger.info("Step 2: Generating PII detection configurations...")
-            config_result = processor.generate_pii_config_bulk(document_ids)
+            # Steps 2-3: Generate PII detection configs and apply masking.
+            # Masking of each document starts as soon as its config is ready.
+            current_app.logger.info("Steps 2-3: Generating PII detection configurations and applying masking...")
+            config_result, masking_result = processor.generate_and_mask_bulk(document_ids)
             
             if config_result['successful_count'] == 0:
                 raise ValueError("All PII detection configurations failed")
             
-            # Get document IDs that successfully generated configs
-            successful_config_document_ids = [config['document_id'] for config in config_result['successful_configs']]
-            current_app.logger.info(f"PII detection completed for {len(successful_config_document_ids)} document(s)")
-            
-            # Step 3: Apply masking with parallel processing
-            current_app.logger.info("Step 3: Applying PII masking...")
-            masking_result = processor.apply_masking_bulk(successful_config_document_ids)
-            
+            current_app.logger.info(f"PII detection completed for {config_result['successful_count']} document(s)")
             current_app.logger.info(f"PII masking completed for {masking_result['successful_count']} document(s)")
             
             # Step 4: Prepare response with processing summary
@@ -1544,13 +2444,18 @@ def process_documents():
                 'download_links': {}
             }
             
+            # Index upload and config results by document ID for O(1) lookups
+            uploads_by_id = {doc['document_id']: doc for doc in upload_result['uploaded_documents']}
+            configs_by_id = {config['document_id']: config for config in config_result['successful_configs']}
+
             # Add information about successfully processed documents
+            processed_ids = set()
             for masking in masking_result['successful_maskings']:
                 document_id = masking['document_id']
-                
+
                 # Find the corresponding upload and config info
-                upload_info = next((doc for doc in upload_result['uploaded_documents'] if doc['document_id'] == document_id), None)
-                config_info = next((config for config in config_result['successful_configs'] if config['document_id'] == document_id), None)
+                upload_info = uploads_by_id.get(document_id)
+                config_info = configs_by_id.get(document_id)
                 
                 if upload_info and config_info:
                     processed_doc = {
@@ -1563,6 +2468,7 @@ def process_documents():
                         'status': 'completed'
                     }
                     processing_summary['processed_documents'].append(processed_doc)
+                    processed_ids.add(document_id)
                     
                     # Add download link
                     processing_summary['download_links'][document_id] = {
@@ -1572,22 +2478,7 @@ def process_documents():
                     }
             
             # Automatically cleanup intermediate files for successfully processed documents
-            try:
-                current_app.logger.info("Auto-cleanup: Removing intermediate files for processed documents")
-                for document_id in [doc['document_id'] for doc in processing_summary['processed_documents']]:
-                    # Clean up uploads and configs, but keep the results
-                    upload_files = list(UPLOADS_DIR.glob(f"{document_id}_*"))
-                    config_files = list(CONFIGS_DIR.glob(f"{document_id}_*"))
-                    
-                    for file_to_remove in upload_files + config_files:
-                        try:
-                            file_to_remove.unlink()
-                            current_app.logger.debug(f"Removed intermediate file: {file_to_remove}")
-                        except Exception as e:
-                            current_app.logger.warning(f"Failed to remove {file_to_remove}: {e}")
-                            
-            except Exception as cleanup_error:
-                current_app.logger.warning(f"Auto-cleanup warning: {cleanup_error}")
+            submit_intermediate_cleanup(processed_ids)
             
             # Determine overall status
             if masking_result['successful_count'] == len(files):
@@ -1614,20 +2505,35 @@ def process_documents():
                 }
             
             current_app.logger.info(f"Document processing completed: {overall_status}")
+            if len(files) >= STREAMING_RESPONSE_THRESHOLD:
+                return streamed_success_response(
+                    processing_summary,
+                    stream_keys=('processed_documents', 'download_links'),
+                    message=message
+                )
             return success_response(processing_summary, message=message)
             
         except Exception as processing_error:
             # If any step fails, clean up uploaded documents
             current_app.logger.error(f"Processing failed: {processing_error}")
             try:
-                for document_id in document_ids:
-                    processor.cleanup_processing_data(document_id)
+                app = current_app._get_current_object()
+
+                def cleanup_with_context(document_id: str):
+                    """Wrapper function that preserves Flask app context."""
+                    with app.app_context():
+                        return processor.cleanup_processing_data(document_id)
+
+                # Overlap the per-document MongoDB and filesystem cleanup
+                list(IO_POOL.map(cleanup_with_context, document_ids))
             except:
                 pass  # Ignore cleanup errors during error handling
             raise processing_error
             
     except ValueError as e:
         return error_response(str(e), 'PROCESSING_ERROR')
+    except RequestEntityTooLarge:
+        raise  # Answered with 413 by the app's HTTP error handler
     except Exception as e:
         current_app.logger.error(f"Document processing error: {str(e)}")
         return error_response('Document processing failed', 'INTERNAL_ERROR')
@@ -1647,20 +2553,17 @@ def analyze_pdf_scan_status(document_id: str):
     try:
         processor = SimpleDocumentProcessor()
         
-        # Find the PDF file
-        uploaded_files = list(UPLOADS_DIR.glob(f"{document_id}_*.pdf"))
+        # Find the uploaded file the same way processing does
+        try:
+            pdf_path = processor._find_document_file(document_id)
+        except ValueError:
+            pdf_path = None
         
-        if not uploaded_files:
+        if pdf_path is None or pdf_path.suffix.lower() != '.pdf':
             return error_response('PDF_NOT_FOUND', f'PDF file not found for document_id: {document_id}', 404)
         
-        pdf_path = uploaded_files[0]
-        
-        # Import and use the PDF scan detector
-        from scripts.pdf_scan_detector import PDFScanDetector
-        detector = PDFScanDetector()
-        
         # Analyze PDF
-        analysis = detector.analyze_pdf(str(pdf_path))
+        analysis = analyze_pdf_cached(pdf_path)
         
         response_data = {
             'document_id': document_id,
@@ -1714,7 +2617,15 @@ def process_ocr_manually(document_id: str):
 # Legacy endpoints for backward compatibility
 @simple_processing_bp.route('/process-document', methods=['POST'])
 def process_document():
-    """Legacy endpoint - redirects to unified process-documents endpoint."""
+    """
+    Legacy endpoint - redirects to unified process-documents endpoint.
+    
+    With ?async=true the document is uploaded and its detection and masking
+    run in the background; the 202 response carries status and download URLs
+    to poll instead of holding the request open until masking finishes.
+    """
+    if wants_async():
+        return _queue_single_document()
     return process_documents()
 
 
@@ -4,11 +4,15 @@ Clean, minimal implementation that works.
 """
 
 import os
-import tempfile
+import io
+import logging
+import html
+import hashlib
 import re
 import uuid
-from typing import Dict, Any, List
-from flask import Blueprint, request, current_app, make_response
+from typing import Dict, Any, List, Iterator, Optional, Union
+from collections import OrderedDict
+from flask import Blueprint, request, current_app, send_file
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from langchain_ollama import ChatOllama
 from utils.responses import success_response, error_response
@@ -21,19 +25,39 @@ from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.messages import SystemMessage, HumanMessage
 import operator
+import httpx
 from dotenv import load_dotenv
 import fitz  # PyMuPDF
+import zstandard as zstd
 import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from bson import ObjectId
+from pymongo import WriteConcern
 
 # Load environment
 load_dotenv()
 
 synthetic_data_bp = Blueprint('synthetic_data', __name__)
 
-# Initialize LLM
-llm = ChatOllama(model="phi3:latest")
+# Chunks sent to the LLM at the same time, so per-chunk network and inference
+# latency overlaps; Ollama queues requests beyond its OLLAMA_NUM_PARALLEL
+LLM_WORKERS = int(os.getenv('SYNTHETIC_LLM_WORKERS', '4'))
+LLM_POOL = ThreadPoolExecutor(max_workers=LLM_WORKERS, thread_name_prefix='synthetic-llm')
+
+# Initialize LLM. The client is shared by the pool threads, so keep one pooled
+# connection per worker; keep the model loaded between jobs and cap the
+# generated tokens so a runaway chunk cannot stall the batch (a 2000 character
+# chunk is roughly 500 tokens).
+llm = ChatOllama(
+    model="phi3:latest",
+    num_ctx=int(os.getenv('SYNTHETIC_LLM_NUM_CTX', '3072')),
+    num_predict=int(os.getenv('SYNTHETIC_LLM_NUM_PREDICT', '1024')),
+    keep_alive=os.getenv('SYNTHETIC_LLM_KEEP_ALIVE', '10m'),
+    client_kwargs={
+        'limits': httpx.Limits(max_connections=LLM_WORKERS, max_keepalive_connections=LLM_WORKERS)
+    }
+)
 
 # Simple State
 class SyntheticState(TypedDict):
@@ -46,62 +70,79 @@ class SyntheticState(TypedDict):
     job_id: str
 
 # Extract text from files
-def extract_text_from_pdf(file_path: str) -> str:
-    """Extract text from PDF."""
-    doc = fitz.open(file_path)
-    text = ""
-    for page in doc:
-        text += page.get_text() + "\n\n"
-    doc.close()
-    return text.strip()
-
-def extract_text_from_file(file_path: str, file_type: str) -> str:
-    """Extract text from file."""
+def iter_pdf_pages(source: Union[str, bytes]) -> Iterator[str]:
+    """Yield the text of each PDF page in order, one page at a time.
+    
+    The PDF is read from a file path, or directly from bytes already in memory.
+    """
+    if isinstance(source, bytes):
+        doc = fitz.open(stream=source, filetype="pdf")
+    else:
+        doc = fitz.open(source)
+    try:
+        for page in doc:
+            yield page.get_text("text")
+    finally:
+        doc.close()
+
+def extract_text_from_bytes(data: bytes, file_type: str) -> str:
+    """Extract text from file content already in memory."""
     if file_type.lower() == '.pdf':
-        return extract_text_from_pdf(file_path)
+        return "\n\n".join(iter_pdf_pages(data)).strip()
     elif file_type.lower() in ['.txt', '.md']:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return f.read()
+        # Same newline handling as reading the file in text mode
+        return data.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
     else:
         raise ValueError(f"Unsupported file type: {file_type}")
 
+# LRU cache of extracted text keyed by source content hash, so generating
+# again from the same document skips extraction. LLM output is deliberately
+# not cached: each dataset is meant to be a different synthetic variant.
+TEXT_CACHE_SIZE = 32
+_text_cache: "OrderedDict[str, str]" = OrderedDict()
+_text_cache_lock = threading.Lock()
+
+def get_cached_text(content_hash: str) -> Optional[str]:
+    """Get previously extracted text for identical content, if cached."""
+    with _text_cache_lock:
+        text = _text_cache.get(content_hash)
+        if text is not None:
+            _text_cache.move_to_end(content_hash)
+        return text
+
+def cache_text(content_hash: str, text: str):
+    """Remember extracted text for a content hash."""
+    with _text_cache_lock:
+        _text_cache[content_hash] = text
+        _text_cache.move_to_end(content_hash)
+        if len(_text_cache) > TEXT_CACHE_SIZE:
+            _text_cache.popitem(last=False)
+
 # Simple chunking
+# Use smaller chunk size and good separators to maintain coherence
+splitter = RecursiveCharacterTextSplitter(
+    chunk_size=2000,  # Smaller chunks for better coherence
+    chunk_overlap=150,  # Reduced overlap
+    separators=["\n\n", "\n", ". ", "! ", "? ", "; ", ", ", " ", ""],
+    keep_separator=True  # Keep separators to maintain structure
+)
+
 def chunk_text(text: str) -> List[str]:
     """Chunk text into manageable pieces while preserving structure."""
     current_app.logger.info(f"Chunking text of {len(text)} characters")
     
-    # Use smaller chunk size and good separators to maintain coherence
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=2000,  # Smaller chunks for better coherence
-        chunk_overlap=150,  # Reduced overlap
-        separators=["\n\n", "\n", ". ", "! ", "? ", "; ", ", ", " ", ""],
-        keep_separator=True  # Keep separators to maintain structure
-    )
-    
     chunks = splitter.split_text(text)
     current_app.logger.info(f"Created {len(chunks)} chunks")
     
     # Log chunk previews to verify order
-    for i, chunk in enumerate(chunks[:3]):  # First 3 chunks only
-        current_app.logger.debug(f"Chunk {i+1} preview: {chunk[:150]}...")
+    if current_app.logger.isEnabledFor(logging.DEBUG):
+        for i, chunk in enumerate(chunks[:3]):  # First 3 chunks only
+            current_app.logger.debug("Chunk %d preview: %.150s...", i + 1, chunk)
     
     return chunks
 
 # Workflow functions
-def generate_synthetic_chunks(state: SyntheticState):
-    """Generate synthetic versions of text chunks."""
-    chunks = state["chunks"]
-    synthetic_chunks = []
-    
-    current_app.logger.info(f"Processing {len(chunks)} chunks for synthetic generation")
-    
-    for i, chunk in enumerate(chunks):
-        try:
-            current_app.logger.info(f"Processing chunk {i+1}: {len(chunk)} characters")
-            current_app.logger.debug(f"Original chunk: {chunk[:100]}...")
-            
-            messages = [
-                SystemMessage(content="""You are a data anonymization expert. Create synthetic data that:
+SYNTHETIC_SYSTEM_PROMPT = """You are a data anonymization expert. Create synthetic data that:
 
 CRITICAL REQUIREMENTS:
 1. MAINTAIN EXACT STRUCTURE: Keep the same paragraph breaks, sentence order, and flow as the original
@@ -110,56 +151,103 @@ CRITICAL REQUIREMENTS:
 4. KEEP FORMAT IDENTICAL: Same document type, tone, and formatting
 5. MAINTAIN LENGTH: Keep approximately the same length as the original
 
-IMPORTANT: Return ONLY the synthetic version with the exact same structure and flow. Do not add explanations, headers, or change the narrative order."""),
-                
-                HumanMessage(content=f"Convert this text to synthetic data while preserving exact structure and flow:\n\n{chunk}")
-            ]
-            
-            response = llm.invoke(messages)
-            synthetic_chunk = response.content.strip()
+IMPORTANT: Return ONLY the synthetic version with the exact same structure and flow. Do not add explanations, headers, or change the narrative order."""
+
+# Markdown code fences the LLM sometimes wraps its answer in
+CODE_FENCE_OPEN_RE = re.compile(r'```[\w]*\n')
+CODE_FENCE_CLOSE_RE = re.compile(r'\n```')
+
+def synthesize_chunk(chunk: str) -> str:
+    """Ask the LLM for a synthetic version of a single chunk."""
+    messages = [
+        SystemMessage(content=SYNTHETIC_SYSTEM_PROMPT),
+        HumanMessage(content=f"Convert this text to synthetic data while preserving exact structure and flow:\n\n{chunk}")
+    ]
+    
+    response = llm.invoke(messages)
+    synthetic_chunk = response.content.strip()
+    
+    # Clean up any unwanted formatting
+    synthetic_chunk = CODE_FENCE_OPEN_RE.sub('', synthetic_chunk)
+    synthetic_chunk = CODE_FENCE_CLOSE_RE.sub('', synthetic_chunk)
+    return synthetic_chunk
+
+def generate_synthetic_chunks(state: SyntheticState):
+    """Generate synthetic versions of text chunks."""
+    chunks = state["chunks"]
+    synthetic_chunks = [None] * len(chunks)
+    
+    current_app.logger.info(f"Processing {len(chunks)} chunks for synthetic generation")
+    
+    # Every chunk goes through the LLM, since short ones can hold names or
+    # IDs too; identical chunks such as repeated headers are sent once and
+    # share the result
+    pending: Dict[str, List[int]] = {}
+    for i, chunk in enumerate(chunks):
+        pending.setdefault(chunk, []).append(i)
+    
+    current_app.logger.info(f"Sending {len(pending)} distinct chunks to the LLM")
+    
+    # Submit every chunk up front; results are placed by index so the
+    # document keeps its original order whatever order they finish in
+    futures = {LLM_POOL.submit(synthesize_chunk, chunk): chunk for chunk in pending}
+    
+    for completed, future in enumerate(as_completed(futures), 1):
+        chunk = futures[future]
+        i = pending[chunk][0]
+        try:
+            synthetic_chunk = future.result()
             
             current_app.logger.info(f"Generated synthetic chunk {i+1}: {len(synthetic_chunk)} characters")
-            current_app.logger.debug(f"Synthetic chunk: {synthetic_chunk[:100]}...")
-            
-            # Clean up any unwanted formatting
-            synthetic_chunk = re.sub(r'```[\w]*\n', '', synthetic_chunk)
-            synthetic_chunk = re.sub(r'\n```', '', synthetic_chunk)
+            current_app.logger.debug("Synthetic chunk: %.100s...", synthetic_chunk)
             
             if not synthetic_chunk.strip():
                 current_app.logger.warning(f"Empty synthetic chunk generated for chunk {i+1}, using fallback")
                 synthetic_chunk = anonymize_text(chunk)
             
-            synthetic_chunks.append(synthetic_chunk)
-            
-            # Update progress
-            progress = ((i + 1) / len(chunks)) * 90  # 90% for processing chunks
-            update_progress(state["job_id"], progress, f"Processing chunk {i+1}/{len(chunks)}")
-            
         except Exception as e:
             current_app.logger.error(f"Failed to process chunk {i}: {e}")
             # Fallback: basic anonymization
             synthetic_chunk = anonymize_text(chunk)
             current_app.logger.info(f"Using fallback for chunk {i+1}: {len(synthetic_chunk)} characters")
-            synthetic_chunks.append(synthetic_chunk)
+        
+        for index in pending[chunk]:
+            synthetic_chunks[index] = synthetic_chunk
+        
+        # Update progress
+        progress = (completed / len(futures)) * 90  # 90% for processing chunks
+        update_progress(state["job_id"], progress, f"Processing chunk {completed}/{len(futures)}",
+                        force=completed == len(futures))
     
     current_app.logger.info(f"Generated {len(synthetic_chunks)} synthetic chunks")
     return {"synthetic_chunks": synthetic_chunks}
 
+# Fallback anonymization patterns; where two match at the same position the
+# earlier one wins
+ANONYMIZE_REPLACEMENTS = [
+    (r'\b[A-Z][a-z]+ [A-Z][a-z]+\b', 'John Smith'),
+    (r'\b\d{3}-\d{2}-\d{4}\b', '123-45-6789'),
+    (r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b', '555-123-4567'),
+    (r'\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b', 'example@email.com'),
+    (r'\$\d{1,3}(?:,\d{3})*(?:\.\d{2})?', '$1,234.56'),
+    (r'\b\d{1,5}\s+[A-Z][a-z]+\s+(?:Street|St|Avenue|Ave|Road|Rd)\b', '123 Main Street'),
+]
+
+# All patterns as one alternation so the text is scanned once; the named
+# group that matched (k0, k1, ...) selects the replacement
+ANONYMIZE_RE = re.compile('|'.join(
+    f'(?P<k{i}>{pattern})' for i, (pattern, _) in enumerate(ANONYMIZE_REPLACEMENTS)
+))
+
+def _anonymize_match(match: re.Match) -> str:
+    return ANONYMIZE_REPLACEMENTS[int(match.lastgroup[1:])][1]
+
 def anonymize_text(text: str) -> str:
     """Basic text anonymization fallback."""
-    replacements = [
-        (r'\b[A-Z][a-z]+ [A-Z][a-z]+\b', 'John Smith'),
-        (r'\b\d{3}-\d{2}-\d{4}\b', '123-45-6789'),
-        (r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b', '555-123-4567'),
-        (r'\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b', 'example@email.com'),
-        (r'\$\d{1,3}(?:,\d{3})*(?:\.\d{2})?', '$1,234.56'),
-        (r'\b\d{1,5}\s+[A-Z][a-z]+\s+(?:Street|St|Avenue|Ave|Road|Rd)\b', '123 Main Street'),
-    ]
-    
-    result = text
-    for pattern, replacement in replacements:
-        result = re.sub(pattern, replacement, result)
-    return result
+    return ANONYMIZE_RE.sub(_anonymize_match, text)
+
+EXCESS_NEWLINES_RE = re.compile(r'\n{4,}')
+PARAGRAPH_BREAK_RE = re.compile(r'\n\s*\n')
 
 def assemble_final_text(state: SyntheticState):
     """Assemble chunks into final synthetic document maintaining order."""
@@ -168,18 +256,19 @@ def assemble_final_text(state: SyntheticState):
     current_app.logger.info(f"Assembling {len(synthetic_chunks)} chunks into final text")
     
     # Log chunk info for debugging
-    for i, chunk in enumerate(synthetic_chunks):
-        current_app.logger.debug(f"Chunk {i+1} length: {len(chunk)} chars")
-        current_app.logger.debug(f"Chunk {i+1} preview: {chunk[:100]}...")
+    if current_app.logger.isEnabledFor(logging.DEBUG):
+        for i, chunk in enumerate(synthetic_chunks):
+            current_app.logger.debug("Chunk %d length: %d chars", i + 1, len(chunk))
+            current_app.logger.debug("Chunk %d preview: %.100s...", i + 1, chunk)
     
     # Join chunks with double newlines to preserve paragraph structure
     final_text = "\n\n".join(chunk.strip() for chunk in synthetic_chunks if chunk.strip())
     
     current_app.logger.info(f"Final assembled text length: {len(final_text)} characters")
-    current_app.logger.debug(f"Final text preview: {final_text[:300]}...")
+    current_app.logger.debug("Final text preview: %.300s...", final_text)
     
     # Clean up excessive newlines but preserve paragraph breaks
-    final_text = re.sub(r'\n{4,}', '\n\n\n', final_text)  # Max 3 newlines
+    final_text = EXCESS_NEWLINES_RE.sub('\n\n\n', final_text)  # Max 3 newlines
     final_text = final_text.strip()
     
     current_app.logger.info(f"Final text after cleanup: {len(final_text)} characters")
@@ -190,7 +279,7 @@ def assemble_final_text(state: SyntheticState):
         final_text = "Synthetic data generation completed, but content appears to be empty. Please check the original document and try again."
     
     # Update progress
-    update_progress(state["job_id"], 95, f"Assembling dataset {state['current_dataset']}")
+    update_progress(state["job_id"], 95, f"Assembling dataset {state['current_dataset']}", force=True)
     
     return {"final_text": final_text}
 
@@ -209,13 +298,32 @@ def create_workflow():
     return graph.compile()
 
 # Helper functions
-def update_progress(job_id: str, progress: float, message: str):
-    """Update job progress."""
+# Minimum seconds between intermediate progress writes for a job
+PROGRESS_WRITE_INTERVAL = 1.0
+_last_progress_write: Dict[str, float] = {}
+_progress_lock = threading.Lock()
+
+def update_progress(job_id: str, progress: float, message: str, force: bool = False):
+    """Update job progress.
+    
+    Intermediate updates are throttled per job and sent unacknowledged; pass
+    force=True for milestones that must always be written (acknowledged).
+    """
+    now = time.monotonic()
+    with _progress_lock:
+        if not force and now - _last_progress_write.get(job_id, 0.0) < PROGRESS_WRITE_INTERVAL:
+            return
+        _last_progress_write[job_id] = now
+    
     try:
         mongo_db = get_mongo_db()
         db = mongo_db.get_database()
         
-        db.synthetic_jobs.update_one(
+        jobs = db.synthetic_jobs
+        if not force:
+            jobs = jobs.with_options(write_concern=WriteConcern(w=0))
+        
+        jobs.update_one(
             {"job_id": job_id},
             {
                 "$set": {
@@ -230,6 +338,9 @@ def update_progress(job_id: str, progress: float, message: str):
 
 def update_job_status(job_id: str, status: str, datasets: List[Dict] = None, error: str = None):
     """Update job status."""
+    with _progress_lock:
+        _last_progress_write.pop(job_id, None)
+    
     try:
         mongo_db = get_mongo_db()
         db = mongo_db.get_database()
@@ -264,66 +375,45 @@ def create_pdf(text_content: str) -> bytes:
             current_app.logger.warning("create_pdf received empty or whitespace-only content")
             return b""
         
-        # Create new PDF document
-        doc = fitz.open()
-        page = doc.new_page(width=612, height=792)  # Letter size
-        
         # Simple settings
         font_size = 11
-        line_height = 14
         margin = 50
-        max_width = 612 - 2 * margin
+        page_rect = fitz.paper_rect("letter")
+        text_rect = page_rect + (margin, margin, -margin, -margin)
         
         # Clean text - preserve structure
         clean_text = text_content.strip().replace('\r\n', '\n').replace('\r', '\n')
         
-        # Insert text using PyMuPDF's built-in text insertion with automatic wrapping
-        text_rect = fitz.Rect(margin, margin, 612 - margin, 792 - margin)
-        
-        current_app.logger.info("Inserting text into PDF with automatic formatting")
-        
-        # Use insert_textbox for automatic line wrapping and page management
-        text_length = page.insert_textbox(
-            text_rect,
-            clean_text,
-            fontsize=font_size,
-            fontname="helv",  # Helvetica
-            color=(0, 0, 0),
-            align=0,  # Left align
-            morph=None
+        # Paragraphs on blank lines, line breaks kept within a paragraph
+        body = "".join(
+            f"<p>{html.escape(paragraph).replace(chr(10), '<br/>')}</p>"
+            for paragraph in PARAGRAPH_BREAK_RE.split(clean_text)
+        )
+        story = fitz.Story(
+            html=body,
+            user_css=f"body {{font-family: sans-serif; font-size: {font_size}pt;}} p {{margin: 0 0 {font_size}pt 0;}}"
         )
         
-        current_app.logger.info(f"Text inserted, used length: {text_length}")
+        current_app.logger.info("Laying out text into PDF pages")
         
-        # If text doesn't fit on one page, handle overflow
-        if text_length < 0:  # Text overflow
-            current_app.logger.info("Text overflowed, creating multiple pages")
-            
-            # Split text into smaller chunks and create multiple pages
-            words = clean_text.split()
-            chunk_size = len(words) // 3  # Rough estimate for 3 pages
-            
-            doc = fitz.open()  # Start fresh
-            
-            for i in range(0, len(words), chunk_size):
-                chunk_words = words[i:i + chunk_size]
-                chunk_text = ' '.join(chunk_words)
-                
-                page = doc.new_page(width=612, height=792)
-                text_rect = fitz.Rect(margin, margin, 612 - margin, 792 - margin)
-                
-                page.insert_textbox(
-                    text_rect,
-                    chunk_text,
-                    fontsize=font_size,
-                    fontname="helv",
-                    color=(0, 0, 0),
-                    align=0
-                )
+        # Story.place fills one page and reports whether text is left over,
+        # so pages are added until the whole text has been laid out
+        buffer = io.BytesIO()
+        writer = fitz.DocumentWriter(buffer)
+        page_count = 0
+        more = True
+        while more:
+            device = writer.begin_page(page_rect)
+            more, _ = story.place(text_rect)
+            story.draw(device)
+            writer.end_page()
+            page_count += 1
+        writer.close()
+        
+        current_app.logger.info(f"Text laid out on {page_count} pages")
         
         # Generate PDF bytes
-        pdf_bytes = doc.write()
-        doc.close()
+        pdf_bytes = buffer.getvalue()
         
         current_app.logger.info(f"PDF created successfully with {len(pdf_bytes)} bytes")
         return pdf_bytes
@@ -346,26 +436,28 @@ class SimpleDataGenerator:
         if not document_data:
             raise ValueError("Document not found")
         
-        # Create temp file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=document_data["file_type"]) as temp_file:
-            temp_file.write(document_data["file_data"])
-            temp_path = temp_file.name
-        
-        try:
-            text_content = extract_text_from_file(temp_path, document_data["file_type"])
+        content_hash = hashlib.sha256(document_data["file_data"]).hexdigest()
+        text_content = get_cached_text(content_hash)
+        if text_content is not None:
+            current_app.logger.info(f"Reusing extracted text for {document_data['original_name']}")
             return text_content, document_data["original_name"], document_data["file_type"]
-        finally:
-            os.unlink(temp_path)
+        
+        # The file is already in memory, so extract without a temp file
+        text_content = extract_text_from_bytes(document_data["file_data"], document_data["file_type"])
+        cache_text(content_hash, text_content)
+        return text_content, document_data["original_name"], document_data["file_type"]
     
     @staticmethod
-    def generate_datasets(document_id: str, user_id: str, num_datasets: int, job_id: str):
+    def generate_datasets(document_id: str, user_id: str, num_datasets: int, job_id: str, app=None):
         """Generate synthetic datasets."""
-        from app import create_app
-        
-        app = create_app()
+        if app is None:
+            from app import create_app
+            app = create_app()
         
         with app.app_context():
             try:
+                update_progress(job_id, 0, "Starting generation...", force=True)
+                
                 # Get document
                 text_content, original_name, file_type = SimpleDataGenerator.get_document(
                     document_id, user_id
@@ -377,13 +469,12 @@ class SimpleDataGenerator:
                 workflow = create_workflow()
                 datasets = []
                 
+                # Chunking is deterministic, so every dataset starts from the same chunks
+                chunks = chunk_text(text_content)
+                
                 for dataset_num in range(1, num_datasets + 1):
                     current_app.logger.info(f"Generating dataset {dataset_num}/{num_datasets}")
                     
-                    # Chunk the text
-                    chunks = chunk_text(text_content)
-                    current_app.logger.info(f"Created {len(chunks)} chunks")
-                    
                     # Prepare state
                     initial_state = {
                         "original_text": text_content,
@@ -411,7 +502,7 @@ class SimpleDataGenerator:
                     
                     # Update progress
                     progress = (dataset_num / num_datasets) * 100
-                    update_progress(job_id, progress, f"Completed dataset {dataset_num}")
+                    update_progress(job_id, progress, f"Completed dataset {dataset_num}", force=True)
                 
                 # Mark as completed
                 update_job_status(job_id, "completed", datasets)
@@ -421,12 +512,50 @@ class SimpleDataGenerator:
                 current_app.logger.error(f"Generation failed: {str(e)}")
                 update_job_status(job_id, "failed", [], str(e))
 
+# Generation jobs run here instead of a thread per request, so concurrent jobs
+# (each driving the LLM pool and holding the document text) stay bounded
+GENERATION_WORKERS = int(os.getenv('SYNTHETIC_GENERATION_WORKERS', '2'))
+GENERATION_POOL = ThreadPoolExecutor(max_workers=GENERATION_WORKERS, thread_name_prefix='synthetic-jobs')
+_generation_jobs: Dict[str, Future] = {}
+_generation_jobs_lock = threading.Lock()
+
+def _forget_generation_job(job_id: str):
+    with _generation_jobs_lock:
+        _generation_jobs.pop(job_id, None)
+
+def submit_generation_job(document_id: str, user_id: str, num_datasets: int, job_id: str) -> None:
+    """Queue synthetic dataset generation for a job."""
+    future = GENERATION_POOL.submit(
+        SimpleDataGenerator.generate_datasets,
+        document_id, user_id, num_datasets, job_id, current_app._get_current_object()
+    )
+    with _generation_jobs_lock:
+        _generation_jobs[job_id] = future
+    future.add_done_callback(lambda _: _forget_generation_job(job_id))
+
+def cancel_generation_job(job_id: str) -> bool:
+    """Cancel a generation job that has not started yet."""
+    with _generation_jobs_lock:
+        future = _generation_jobs.get(job_id)
+    return future is not None and future.cancel()
+
+# Dataset content is stored zstd-compressed; natural language text shrinks
+# several times, which keeps the synthetic_datasets working set small
+CONTENT_COMPRESSION_LEVEL = 6
+
+def load_dataset_content(dataset: Dict[str, Any]) -> str:
+    """Get the text of a stored dataset, decompressing it if needed."""
+    if "content_zstd" in dataset:
+        return zstd.ZstdDecompressor().decompress(dataset["content_zstd"]).decode('utf-8')
+    # Datasets stored before compression keep their text inline
+    return dataset.get("content", "")
+
 def store_dataset(user_id: str, original_document_id: str, original_name: str,
                  synthetic_content: str, dataset_number: int, job_id: str, file_type: str) -> Dict[str, Any]:
     """Store synthetic dataset."""
     
     current_app.logger.info(f"Storing dataset {dataset_number} with {len(synthetic_content)} characters")
-    current_app.logger.debug(f"Content preview: {synthetic_content[:200]}...")
+    current_app.logger.debug("Content preview: %.200s...", synthetic_content)
     
     if not synthetic_content.strip():
         current_app.logger.error(f"WARNING: Trying to store empty synthetic content for dataset {dataset_number}")
@@ -434,6 +563,9 @@ def store_dataset(user_id: str, original_document_id: str, original_name: str,
     mongo_db = get_mongo_db()
     db = mongo_db.get_database()
     
+    # Encoded once for both the stored content and its size
+    encoded_content = synthetic_content.encode('utf-8')
+    
     synthetic_doc = {
         "user_id": user_id,
         "original_document_id": original_document_id,
@@ -441,11 +573,11 @@ def store_dataset(user_id: str, original_document_id: str, original_name: str,
         "synthetic_name": f"synthetic_{dataset_number}_{original_name}",
         "dataset_number": dataset_number,
         "job_id": job_id,
-        "content": synthetic_content,
+        "content_zstd": zstd.ZstdCompressor(level=CONTENT_COMPRESSION_LEVEL).compress(encoded_content),
         "original_file_type": file_type,
         "original_mime_type": "application/pdf" if file_type.lower() == ".pdf" else "text/plain",
         "created_at": get_current_timestamp(),
-        "size": len(synthetic_content.encode('utf-8'))
+        "size": len(encoded_content)
     }
     
     result = db.synthetic_datasets.insert_one(synthetic_doc)
@@ -502,7 +634,7 @@ def start_generation():
             )
         
         # Create job
-        job_id = f"job_{int(time.time())}_{user_id}"
+        job_id = f"job_{uuid.uuid4().hex}"
         
         job_record = {
             "job_id": job_id,
@@ -512,20 +644,15 @@ def start_generation():
             "num_datasets": num_datasets,
             "status": "processing",
             "progress": 0.0,
-            "status_message": "Starting generation...",
+            "status_message": "Queued for generation...",
             "created_at": get_current_timestamp(),
             "updated_at": get_current_timestamp()
         }
         
         db.synthetic_jobs.insert_one(job_record)
         
-        # Start background generation
-        thread = threading.Thread(
-            target=SimpleDataGenerator.generate_datasets,
-            args=(document_id, user_id, num_datasets, job_id)
-        )
-        thread.daemon = True
-        thread.start()
+        # Queue background generation
+        submit_generation_job(document_id, user_id, num_datasets, job_id)
         
         return success_response(
             message="Generation started",
@@ -582,6 +709,47 @@ def get_status(job_id: str):
             details=str(e)
         )
 
+@synthetic_data_bp.route('/jobs/<job_id>/cancel', methods=['POST'])
+@jwt_required()
+def cancel_job(job_id: str):
+    """Cancel a generation job that is still queued."""
+    try:
+        user_id = get_jwt_identity()
+        mongo_db = get_mongo_db()
+        db = mongo_db.get_database()
+        
+        job = db.synthetic_jobs.find_one({
+            "job_id": job_id,
+            "user_id": user_id
+        })
+        
+        if not job:
+            return error_response(
+                code="JOB_NOT_FOUND",
+                message="Job not found"
+            )
+        
+        if not cancel_generation_job(job_id):
+            return error_response(
+                code="CANCEL_ERROR",
+                message="Job has already started or finished"
+            )
+        
+        update_job_status(job_id, "cancelled")
+        
+        return success_response(
+            message="Job cancelled",
+            data={"job_id": job_id, "status": "cancelled"}
+        )
+        
+    except Exception as e:
+        current_app.logger.error(f"Job cancel failed: {str(e)}")
+        return error_response(
+            code="CANCEL_ERROR",
+            message="Failed to cancel job",
+            details=str(e)
+        )
+
 @synthetic_data_bp.route('/datasets/<dataset_id>/download', methods=['GET'])
 @jwt_required()
 def download_dataset(dataset_id: str):
@@ -605,12 +773,12 @@ def download_dataset(dataset_id: str):
                 message="Dataset not found"
             )
         
-        current_app.logger.info(f"Found dataset: {dataset.get('synthetic_name')} with content length: {len(dataset.get('content', ''))}")
-        
         # Get file info
         original_file_type = dataset.get("original_file_type", ".txt")
         synthetic_name = dataset['synthetic_name']
-        content = dataset.get("content", "")
+        content = load_dataset_content(dataset)
+        
+        current_app.logger.info(f"Found dataset: {synthetic_name} with content length: {len(content)}")
         
         current_app.logger.info(f"Original file type: {original_file_type}")
         current_app.logger.info(f"Content length: {len(content)}")
@@ -638,11 +806,17 @@ def download_dataset(dataset_id: str):
         
         current_app.logger.info(f"Final file content length: {len(file_content)} bytes")
         
-        # Create response
-        response = make_response(file_content)
-        response.headers["Content-Type"] = content_type
-        response.headers["Content-Disposition"] = f"attachment; filename=\"{synthetic_name}\""
-        response.headers["Content-Length"] = str(len(file_content))
+        # BytesIO shares the bytes buffer rather than copying it, and lets
+        # send_file serve Range and conditional requests; datasets never
+        # change after they are stored, so the ID is a stable ETag
+        response = send_file(
+            io.BytesIO(file_content),
+            mimetype=content_type,
+            as_attachment=True,
+            download_name=synthetic_name,
+            etag=dataset_id,
+            conditional=True
+        )
         
         current_app.logger.info(f"Download response created for {synthetic_name}")
         return response
@@ -664,6 +838,7 @@ def list_datasets():
         mongo_db = get_mongo_db()
         db = mongo_db.get_database()
         
+        # Only list fields are projected; content can be megabytes per dataset
         datasets = list(db.synthetic_datasets.find(
             {"user_id": user_id},
             {"_id": 1, "synthetic_name": 1, "original_name": 1, 
@@ -744,10 +919,9 @@ def preview_dataset(dataset_id: str):
                 message="Dataset not found"
             )
         
-        current_app.logger.info(f"Found dataset: {dataset.get('synthetic_name')} with content length: {len(dataset.get('content', ''))}")
-        
         # Return full content for preview (no truncation)
-        content = dataset.get("content", "")
+        content = load_dataset_content(dataset)
+        current_app.logger.info(f"Found dataset: {dataset.get('synthetic_name')} with content length: {len(content)}")
         current_app.logger.info(f"Content preview (first 100 chars): {content[:100]}")
         
         content_preview = content  # Return full content, no truncation
@@ -3,15 +3,24 @@ Centralized error handling for the application.
 All custom exceptions and error handlers are defined here.
 """
 
-from typing import Dict, Any, Optional
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Optional
 from flask import jsonify, request, current_app
 from werkzeug.exceptions import HTTPException
 import traceback
+from .helpers import get_response_timestamp
+
+
+# Shared read-only details for errors raised without any
+_EMPTY_DETAILS: Mapping[str, Any] = MappingProxyType({})
 
 
 class AppError(Exception):
     """Base application error class."""
     
+    # Keeps these attributes out of a per-instance __dict__
+    __slots__ = ('message', 'code', 'status_code', 'details')
+    
     def __init__(
         self, 
         message: str, 
@@ -22,13 +31,15 @@ class AppError(Exception):
         self.message = message
         self.code = code
         self.status_code = status_code
-        self.details = details or {}
+        self.details = details if details is not None else _EMPTY_DETAILS
         super().__init__(self.message)
 
 
 class BadRequestError(AppError):
     """400 Bad Request errors."""
     
+    __slots__ = ()
+    
     def __init__(self, message: str = "Bad request", code: str = "BAD_REQUEST", details: Optional[Dict[str, Any]] = None):
         super().__init__(message, code, 400, details)
 
@@ -36,6 +47,8 @@ class BadRequestError(AppError):
 class UnauthorizedError(AppError):
     """401 Unauthorized errors."""
     
+    __slots__ = ()
+    
     def __init__(self, message: str = "Unauthorized", code: str = "UNAUTHORIZED", details: Optional[Dict[str, Any]] = None):
         super().__init__(message, code, 401, details)
 
@@ -43,6 +56,8 @@ class UnauthorizedError(AppError):
 class ForbiddenError(AppError):
     """403 Forbidden errors."""
     
+    __slots__ = ()
+    
     def __init__(self, message: str = "Forbidden", code: str = "FORBIDDEN", details: Optional[Dict[str, Any]] = None):
         super().__init__(message, code, 403, details)
 
@@ -50,6 +65,8 @@ class ForbiddenError(AppError):
 class NotFoundError(AppError):
     """404 Not Found errors."""
     
+    __slots__ = ()
+    
     def __init__(self, message: str = "Resource not found", code: str = "NOT_FOUND", details: Optional[Dict[str, Any]] = None):
         super().__init__(message, code, 404, details)
 
@@ -57,6 +74,8 @@ class NotFoundError(AppError):
 class ConflictError(AppError):
     """409 Conflict errors."""
     
+    __slots__ = ()
+    
     def __init__(self, message: str = "Conflict", code: str = "CONFLICT", details: Optional[Dict[str, Any]] = None):
         super().__init__(message, code, 409, details)
 
@@ -64,6 +83,8 @@ class ConflictError(AppError):
 class ValidationError(BadRequestError):
     """Validation-specific errors."""
     
+    __slots__ = ()
+    
     def __init__(self, message: str = "Validation failed", details: Optional[Dict[str, Any]] = None):
         super().__init__(message, "VALIDATION_ERROR", details)
 
@@ -71,6 +92,8 @@ class ValidationError(BadRequestError):
 class RateLimitError(AppError):
     """429 Rate Limit errors."""
     
+    __slots__ = ()
+    
     def __init__(self, message: str = "Rate limit exceeded", code: str = "RATE_LIMIT_EXCEEDED", details: Optional[Dict[str, Any]] = None):
         super().__init__(message, code, 429, details)
 
@@ -78,6 +101,8 @@ class RateLimitError(AppError):
 class InternalServerError(AppError):
     """500 Internal Server errors."""
     
+    __slots__ = ()
+    
     def __init__(self, message: str = "Internal server error", code: str = "INTERNAL_ERROR", details: Optional[Dict[str, Any]] = None):
         super().__init__(message, code, 500, details)
 
@@ -100,7 +125,7 @@ def create_error_response(
         },
         "meta": {
             "request_id": request_id,
-            "timestamp": str(current_app.config.get('CURRENT_TIME', ''))
+            "timestamp": get_response_timestamp()
         }
     }
     
@@ -184,10 +209,9 @@ def register_error_handlers(app):
         
         current_app.logger.error(
             f"Unexpected error: {str(error)}",
-            extra={
-                'request_id': request_id,
-                'traceback': traceback.format_exc()
-            }
+            extra={'request_id': request_id},
+            # The handler formats the traceback, and only if the record is emitted
+            exc_info=True
         )
         
         # Don't expose internal errors in production
@@ -3,9 +3,9 @@ Standardized response utilities.
 All API responses should use these functions for consistency.
 """
 
-from typing import Any, Optional, Dict
-from flask import jsonify, g
-from datetime import datetime, timezone
+from typing import Any, Optional, Dict, Iterable
+from flask import jsonify, g, current_app, Response, stream_with_context
+from .helpers import get_response_timestamp
 
 
 def success_response(
@@ -24,6 +24,46 @@ def success_response(
     return jsonify(response), status_code
 
 
+def streamed_success_response(
+    data: Dict[str, Any],
+    stream_keys: Iterable[str] = (),
+    message: Optional[str] = None,
+    meta: Optional[Dict[str, Any]] = None,
+    status_code: int = 200
+) -> tuple:
+    """
+    Create a successful API response serialized incrementally.
+    
+    Lists and dicts under stream_keys are written one entry at a time,
+    so the full JSON body is never built in memory.
+    """
+    dumps = current_app.json.dumps
+    stream_keys = frozenset(stream_keys)
+    response_meta = dumps(_create_meta(meta, message))
+    
+    def generate():
+        yield '{"status":"success","data":{'
+        for index, (key, value) in enumerate(data.items()):
+            if index:
+                yield ','
+            yield dumps(key) + ':'
+            if key not in stream_keys:
+                yield dumps(value)
+            elif isinstance(value, dict):
+                yield '{'
+                for item_index, (item_key, item) in enumerate(value.items()):
+                    yield (',' if item_index else '') + dumps(str(item_key)) + ':' + dumps(item)
+                yield '}'
+            else:
+                yield '['
+                for item_index, item in enumerate(value):
+                    yield (',' if item_index else '') + dumps(item)
+                yield ']'
+        yield '},"error":null,"meta":' + response_meta + '}'
+    
+    return Response(stream_with_context(generate()), mimetype='application/json'), status_code
+
+
 def error_response(
     code: str,
     message: str,
@@ -57,18 +97,21 @@ def paginated_response(
     meta: Optional[Dict[str, Any]] = None
 ) -> tuple:
     """Create a paginated response."""
+    # per_page of 0 would divide by zero; report no pages instead
+    pages, remainder = divmod(total, per_page) if per_page else (0, 0)
+    if remainder:
+        pages += 1
+    
     pagination_meta = {
         "page": page,
         "per_page": per_page,
         "total": total,
-        "pages": (total + per_page - 1) // per_page,
-        "has_next": page * per_page < total,
-        "has_prev": page > 1
+        "pages": pages,
+        "has_next": page < pages,
+        "has_prev": page > 1,
+        **(meta or {})
     }
     
-    if meta:
-        pagination_meta.update(meta)
-    
     return success_response(
         data=data,
         message=message,
@@ -82,7 +125,7 @@ def _create_meta(
 ) -> Dict[str, Any]:
     """Create metadata for response."""
     base_meta = {
-        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "timestamp": get_response_timestamp(),
         "request_id": getattr(g, 'request_id', 'unknown')
     }
     
@@ -98,7 +141,8 @@ def _create_meta(
 def validate_request_json(schema_class, data: dict):
     """Validate request data against Pydantic schema."""
     try:
-        return schema_class(**data)
+        # Validates the dict directly with the model's compiled core validator
+        return schema_class.model_validate(data)
     except Exception as e:
         from .errors import ValidationError
         raise ValidationError(
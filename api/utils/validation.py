@@ -5,7 +5,7 @@ All API input/output schemas are defined here.
 
 from typing import Optional, List, Dict, Any, Union
 from datetime import datetime
-from pydantic import BaseModel, EmailStr, Field, validator
+from pydantic import BaseModel, EmailStr, Field, field_validator
 from enum import Enum
 
 
@@ -68,7 +68,8 @@ class RegisterRequest(BaseModel):
     first_name: str = Field(..., min_length=1, max_length=50, description="First name")
     last_name: str = Field(..., min_length=1, max_length=50, description="Last name")
     
-    @validator('password')
+    @field_validator('password')
+    @classmethod
     def validate_password(cls, v):
         if len(v) < 8:
             raise ValueError('Password must be at least 8 characters long')